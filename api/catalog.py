@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from api.client import ApiClient
+from api.enums import Endpoint
+from api.exceptions import NoSuchEntityException
+from config_reader import config
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.subjects: Dict[int, dict] = {}
+        self.cities: Dict[int, dict] = {}
+        self.loaded_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+        self.loads = 0
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def load(self, client: ApiClient, force: bool = False):
+        if self.is_fresh() and not force:
+            return
+
+        async with self.lock:
+            if self.is_fresh() and not force:
+                return
+
+            subjects, cities = await asyncio.gather(
+                client.get_all(Endpoint.SUBJECT),
+                client.get_all(Endpoint.CITY)
+            )
+            self.subjects = {subject.get("id"): subject for subject in subjects.get("responseList") or []}
+            self.cities = {city.get("id"): city for city in cities.get("responseList") or []}
+            self.loaded_at = time.monotonic()
+            self.loads += 1
+            logger.info("Catalog loaded: %s subjects, %s cities", len(self.subjects), len(self.cities))
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def get_subjects(self, client: ApiClient) -> List[dict]:
+        await self.load(client)
+        return list(self.subjects.values())
+
+    async def get_subject(self, client: ApiClient, subject_id: int) -> dict:
+        await self.load(client)
+        subject = self.subjects.get(subject_id)
+        if subject is None:
+            subject = await client.get_by_id(Endpoint.SUBJECT, subject_id)
+            if not subject:
+                raise NoSuchEntityException("Направление не найдено")
+
+            self.subjects[subject_id] = subject
+
+        return subject
+
+    async def get_city(self, client: ApiClient, city_id: int) -> dict:
+        await self.load(client)
+        city = self.cities.get(city_id)
+        if city is None:
+            city = await client.get_by_id(Endpoint.CITY, city_id)
+            if not city:
+                raise NoSuchEntityException("Город не найден")
+
+            self.cities[city_id] = city
+
+        return city
+
+    async def get_cities(self, client: ApiClient, subject_id: int) -> List[dict]:
+        await self.load(client)
+        return [city for city in self.cities.values() if city.get("subjectId") == subject_id]
+
+    async def get_cities_by_ids(self, client: ApiClient, city_ids: List[int]) -> List[dict]:
+        await self.load(client)
+        for city_id in set(city_ids) - self.cities.keys():
+            await self.get_city(client, city_id)
+
+        ids = set(city_ids)
+        return [city for city in self.cities.values() if city.get("id") in ids]
+
+
+catalog = Catalog(ttl=config.CATALOG_CACHE_TTL)
@@ -1,16 +1,47 @@
+import asyncio
+import copy
 import json
 import random
 import string
-import requests
+from typing import Optional, Union, List
 
+import aiohttp
+
+from config_reader import config
+from database.cache import CachedUser
 from database.models import User, Role
 from api.enums import Endpoint, Method
+from api.response_cache import response_cache
 from api.exceptions import ValidationException, NoSuchEntityException, InternalServerError, BadRequestException, \
     ForbiddenException
 
+http_session: Optional[aiohttp.ClientSession] = None
+
+
+async def open_http_session() -> aiohttp.ClientSession:
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=config.API_POOL_SIZE,
+            limit_per_host=config.API_POOL_SIZE,
+            keepalive_timeout=config.API_KEEPALIVE_TIMEOUT
+        )
+        timeout = aiohttp.ClientTimeout(total=config.API_TIMEOUT, connect=config.API_CONNECT_TIMEOUT)
+        http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    return http_session
+
+
+async def close_http_session():
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+
+    http_session = None
+
 
 class ApiClient:
-    def __init__(self, user: User):
+    def __init__(self, user: Union[User, CachedUser]):
         self.user = user
 
     def permit(self, endpoint: Endpoint, method: Method):
@@ -59,38 +90,98 @@ class ApiClient:
         letters_and_digits = string.ascii_letters + string.digits
         return "".join(random.choice(letters_and_digits) for _ in range(length))
 
-    def create(self, endpoint: Endpoint, body: dict):
+    @staticmethod
+    async def request(method: Method, url: str, **kwargs) -> dict:
+        session = await open_http_session()
+        async with session.request(method.value, url, **kwargs) as response:
+            return json.loads(await response.text())
+
+    @staticmethod
+    async def get(endpoint: Endpoint, url: str, params: dict = None) -> dict:
+        if not response_cache.is_enabled(endpoint):
+            return await ApiClient.request(Method.GET, url, params=params)
+
+        key = response_cache.build_key(url, params)
+        cached = response_cache.get(key)
+        if cached is not None and cached.is_fresh():
+            return response_cache.copy_body(cached)
+
+        generation = response_cache.get_generation(endpoint)
+        headers = response_cache.get_conditional_headers(cached)
+        session = await open_http_session()
+        async with session.request(Method.GET.value, url, params=params, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                response_cache.mark_not_modified(key, cached)
+                return response_cache.copy_body(cached)
+
+            body = json.loads(await response.text())
+            if not body.get("error"):
+                response_cache.store(key, endpoint, copy.deepcopy(body), response.headers, generation)
+
+            return body
+
+    async def create(self, endpoint: Endpoint, body: dict):
         self.permit(endpoint, Method.POST)
-        response = json.loads(requests.post(endpoint.value, json=body).text)
+        try:
+            response = await self.request(Method.POST, endpoint.value, json=body)
+
+        finally:
+            response_cache.invalidate(endpoint)
+
         self.valid(response)
         return response.get("result")
 
-    def update(self, endpoint: Endpoint, body: dict):
+    async def create_many(self, endpoint: Endpoint, bodies: List[dict],
+                          concurrency: int = None) -> List[Union[dict, Exception]]:
+        self.permit(endpoint, Method.POST)
+        semaphore = asyncio.Semaphore(concurrency or config.API_BULK_CONCURRENCY)
+
+        async def create_one(body: dict):
+            async with semaphore:
+                response = await self.request(Method.POST, endpoint.value, json=body)
+                self.valid(response)
+                return response.get("result")
+
+        try:
+            return await asyncio.gather(*(create_one(body) for body in bodies), return_exceptions=True)
+
+        finally:
+            response_cache.invalidate(endpoint)
+
+    async def update(self, endpoint: Endpoint, body: dict):
         self.permit(endpoint, Method.PUT)
-        response = json.loads(requests.put(endpoint.value, json=body).text)
+        try:
+            response = await self.request(Method.PUT, endpoint.value, json=body)
+
+        finally:
+            response_cache.invalidate(endpoint)
+
         self.valid(response)
         return response.get("result")
 
-    def delete(self, endpoint: Endpoint, _id: int):
+    async def delete(self, endpoint: Endpoint, _id: int):
         self.permit(endpoint, Method.DELETE)
-        response = json.loads(requests.delete(f"{endpoint.value}/{_id}").text)
+        try:
+            response = await self.request(Method.DELETE, f"{endpoint.value}/{_id}")
+
+        finally:
+            response_cache.invalidate(endpoint)
+
         self.valid(response)
         return response.get("result")
 
-    def get_by_id(self, endpoint: Endpoint, _id: int):
+    async def get_by_id(self, endpoint: Endpoint, _id: int):
         self.permit(endpoint, Method.GET)
-        response = json.loads(requests.get(f"{endpoint.value}/{_id}").text)
+        response = await self.get(endpoint, f"{endpoint.value}/{_id}")
         self.valid(response)
         return response.get("result")
 
-    def get_all(self, endpoint: Endpoint, restrict: dict = None):
+    async def get_all(self, endpoint: Endpoint, restrict: dict = None):
         self.permit(endpoint, Method.GET)
 
         if restrict is None:
             restrict = {}
 
-        response = json.loads(
-            requests.get(endpoint.value, params={"restrict": json.dumps(restrict)}).text
-        )
+        response = await self.get(endpoint, endpoint.value, params={"restrict": json.dumps(restrict)})
         self.valid(response)
         return response.get("result")
@@ -0,0 +1,120 @@
+import copy
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from multidict import CIMultiDictProxy
+
+from api.enums import Endpoint
+from config_reader import config
+from utils.cache import TTLCache, MISSING
+
+DEPENDENT_ENDPOINTS = {
+    Endpoint.POST: (Endpoint.SCHEDULE,)
+}
+
+
+class CachedResponse:
+    def __init__(self, endpoint: Endpoint, body: dict, etag: Optional[str], last_modified: Optional[str],
+                 fresh_until: float):
+        self.endpoint = endpoint
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = fresh_until
+
+    def is_fresh(self) -> bool:
+        return self.fresh_until > time.monotonic()
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, endpoints: Set[Endpoint], ttl: float, stale_ttl: float, max_size: int):
+        self.endpoints = endpoints
+        self.ttl = ttl
+        self.entries = TTLCache(max_size=max_size, ttl=max(stale_ttl, ttl))
+        self.generations: Dict[Endpoint, int] = {}
+
+        self.fresh_hits = 0
+        self.revalidations = 0
+        self.not_modified = 0
+
+    def is_enabled(self, endpoint: Endpoint) -> bool:
+        return endpoint in self.endpoints
+
+    @staticmethod
+    def build_key(url: str, params: Optional[dict]) -> Tuple[str, tuple]:
+        return url, tuple(sorted(params.items())) if params else ()
+
+    def get_generation(self, endpoint: Endpoint) -> int:
+        return self.generations.get(endpoint, 0)
+
+    def get(self, key: Tuple[str, tuple]) -> Optional[CachedResponse]:
+        cached = self.entries.get(key)
+        if cached is MISSING:
+            return None
+
+        if cached.is_fresh():
+            self.fresh_hits += 1
+
+        return cached
+
+    def get_conditional_headers(self, cached: Optional[CachedResponse]) -> Dict[str, str]:
+        if cached is None:
+            return {}
+
+        headers = cached.get_conditional_headers()
+        if headers:
+            self.revalidations += 1
+
+        return headers
+
+    def store(self, key: Tuple[str, tuple], endpoint: Endpoint, body: dict, headers: CIMultiDictProxy,
+              generation: int):
+        if generation != self.get_generation(endpoint):
+            return
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        self.entries.set(key, CachedResponse(endpoint, body, etag, last_modified, time.monotonic() + self.ttl))
+
+    def mark_not_modified(self, key: Tuple[str, tuple], cached: CachedResponse):
+        self.not_modified += 1
+        cached.fresh_until = time.monotonic() + self.ttl
+        self.entries.set(key, cached)
+
+    def invalidate(self, endpoint: Endpoint):
+        for invalidated in (endpoint, *DEPENDENT_ENDPOINTS.get(endpoint, ())):
+            if not self.is_enabled(invalidated):
+                continue
+
+            self.generations[invalidated] = self.get_generation(invalidated) + 1
+            self.entries.pop_where(lambda cached: cached.endpoint == invalidated)
+
+    @staticmethod
+    def copy_body(cached: CachedResponse) -> dict:
+        return copy.deepcopy(cached.body)
+
+    def stats(self) -> dict:
+        return {
+            **self.entries.stats(),
+            "fresh_hits": self.fresh_hits,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified
+        }
+
+
+response_cache = ResponseCache(
+    endpoints={Endpoint[name.upper()] for name in config.API_CACHE_ENDPOINTS},
+    ttl=config.API_CACHE_TTL,
+    stale_ttl=config.API_CACHE_STALE_TTL,
+    max_size=config.API_CACHE_SIZE
+)
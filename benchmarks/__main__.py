@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.backend import FakeBackend
+
+SCENARIO_NAMES = ("group_flood", "vendor_menu", "post_creation", "statistics", "admin_users")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL",
+                                                                 os.environ.get("DATABASE_URL")),
+                        help="PostgreSQL server to create the throwaway database on")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIO_NAMES, default=list(SCENARIO_NAMES))
+    parser.add_argument("--subjects", type=int, default=3)
+    parser.add_argument("--cities-per-subject", type=int, default=5)
+    parser.add_argument("--vendors", type=int, default=20)
+    parser.add_argument("--groups-per-vendor", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5, help="Flow repetitions per simulated user")
+    parser.add_argument("--messages", type=int, default=5000, help="Group messages in the flood scenario")
+    parser.add_argument("--post-slots", type=int, default=30, help="Calendar slots per created post")
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent updates in the flood scenario")
+    parser.add_argument("--backend-latency-ms", type=float, default=0)
+    parser.add_argument("--db-pool-size", type=int, help="Overrides DB_POOL_SIZE")
+    parser.add_argument("--db-max-overflow", type=int, help="Overrides DB_MAX_OVERFLOW")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Print the difference against a previous JSON result")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCHMARK_DATABASE_URL is required")
+
+    return args
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+
+    except Exception:
+        return "unknown"
+
+
+async def create_database(server_url: str) -> str:
+    url = make_url(server_url)
+    name = f"benchmark_{uuid.uuid4().hex[:12]}"
+    engine = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    async with engine.connect() as connection:
+        await connection.execute(text(f'CREATE DATABASE "{name}"'))
+
+    await engine.dispose()
+    return url.set(database=name).render_as_string(hide_password=False)
+
+
+async def drop_database(database_url: str):
+    url = make_url(database_url)
+    engine = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    async with engine.connect() as connection:
+        await connection.execute(text(f'DROP DATABASE IF EXISTS "{url.database}" WITH (FORCE)'))
+
+    await engine.dispose()
+
+
+def print_report(results: dict):
+    pool = results["db_pool"]
+    print(f"Database pool: {pool['checkouts']} checkouts, avg wait {pool['avg_wait'] * 1000:.2f} ms, "
+          f"max wait {pool['max_wait'] * 1000:.1f} ms, {pool['timeouts']} timeouts")
+
+    for name, scenario in results["scenarios"].items():
+        latency = scenario["latency"]
+        print(f"\n{name}: {scenario['updates']} updates, {scenario['errors']} errors, "
+              f"{scenario['updates_per_sec']:.1f} updates/s, p50 {latency['p50_ms']:.1f} ms, "
+              f"p95 {latency['p95_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms")
+
+        for handler, stats in scenario["handlers"].items():
+            print(f"  {handler}: {stats['count']} calls, p50 {stats['p50_ms']:.1f} ms, "
+                  f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\nCompared with {baseline.get('commit')}:")
+    for name, scenario in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+
+        throughput = (scenario["updates_per_sec"] / previous["updates_per_sec"] - 1) * 100 \
+            if previous["updates_per_sec"] else 0
+        p95 = scenario["latency"]["p95_ms"] - previous["latency"]["p95_ms"]
+        print(f"  {name}: throughput {throughput:+.1f}%, p95 {p95:+.1f} ms")
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    backend = FakeBackend(latency_ms=args.backend_latency_ms)
+    api_base_url = await backend.start()
+    database_url = await create_database(args.database_url)
+
+    os.environ.update({
+        "API_BASE_URL": api_base_url,
+        "DATABASE_URL": database_url,
+        "BOT_API_TOKEN": "123456:benchmark",
+        "ADMIN_TELEGRAM_IDS": "[1]",
+        "DEFAULT_CLIENT_MESSAGE": "Benchmark",
+        "CALENDAR_URL": "https://example.com/calendar",
+        "GENERAL_CHANNEL_TELEGRAM_ID": "-100"
+    })
+
+    if args.db_pool_size is not None:
+        os.environ["DB_POOL_SIZE"] = str(args.db_pool_size)
+
+    if args.db_max_overflow is not None:
+        os.environ["DB_MAX_OVERFLOW"] = str(args.db_max_overflow)
+
+    started_at = datetime.now()
+    try:
+        from benchmarks.scenarios import run_benchmark
+        results = await run_benchmark(backend, args)
+
+    finally:
+        await drop_database(database_url)
+        await backend.stop()
+
+    results = {
+        "commit": get_commit(),
+        "started_at": started_at.isoformat(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("database_url", "output",
+                                                                                       "compare")},
+        **results
+    }
+
+    print_report(results)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(results, json.load(file))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import asyncio
+import json
+from collections import Counter
+from itertools import count
+
+from aiohttp import web
+
+COLLECTIONS = ("subject", "city", "group", "post", "user")
+
+
+class FakeBackend:
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000
+        self.ids = count(1)
+        self.collections = {name: {} for name in COLLECTIONS}
+        self.requests = Counter()
+        self.runner = None
+
+    def add(self, collection: str, item: dict) -> dict:
+        item = {**item, "id": item.get("id") or next(self.ids)}
+        self.collections[collection][item["id"]] = item
+        return item
+
+    @staticmethod
+    def error(code: int, message: str) -> web.Response:
+        return web.json_response({"error": {"code": code, "message": message, "errors": [message]}})
+
+    @staticmethod
+    def matches(item: dict, restrict: dict) -> bool:
+        for key, value in restrict.items():
+            if key == "ids":
+                if item.get("id") not in value:
+                    return False
+
+            elif str(item.get(key)) != str(value):
+                return False
+
+        return True
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.requests[f"{request.method} {request.match_info.route.resource.canonical}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return await handler(request)
+
+    async def get_all(self, request: web.Request) -> web.Response:
+        collection = self.collections[request.match_info["collection"]]
+        restrict = json.loads(request.query.get("restrict") or "{}")
+        items = [item for item in collection.values() if self.matches(item, restrict)]
+        return web.json_response({"result": {"responseList": items, "total": len(items)}})
+
+    async def get_by_id(self, request: web.Request) -> web.Response:
+        item = self.collections[request.match_info["collection"]].get(int(request.match_info["id"]))
+        if item is None:
+            return self.error(404, "Not found")
+
+        return web.json_response({"result": item})
+
+    async def create(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        body.pop("id", None)
+        return web.json_response({"result": self.add(request.match_info["collection"], body)})
+
+    async def update(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        item = self.collections[request.match_info["collection"]].get(body.get("id"))
+        if item is None:
+            return self.error(404, "Not found")
+
+        item.update(body)
+        return web.json_response({"result": item})
+
+    async def delete(self, request: web.Request) -> web.Response:
+        item = self.collections[request.match_info["collection"]].pop(int(request.match_info["id"]), None)
+        if item is None:
+            return self.error(404, "Not found")
+
+        return web.json_response({"result": item})
+
+    async def get_schedule(self, request: web.Request) -> web.Response:
+        days = [{"times": [f"{hour:02}:00" for hour in range(9, 21)]} for _ in range(7)]
+        return web.json_response({"result": {"groupId": int(request.match_info["id"]), "weeks": [{"days": days}]}})
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        collections = "{collection:" + "|".join(COLLECTIONS) + "}"
+        app.router.add_get(f"/api/{collections}", self.get_all)
+        app.router.add_get(f"/api/{collections}/{{id:\\d+}}", self.get_by_id)
+        app.router.add_post(f"/api/{collections}", self.create)
+        app.router.add_put(f"/api/{collections}", self.update)
+        app.router.add_delete(f"/api/{collections}/{{id:\\d+}}", self.delete)
+        app.router.add_get("/api/schedule/{id:\\d+}", self.get_schedule)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self.runner = web.AppRunner(self.build_app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        bound_port = self.runner.addresses[0][1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
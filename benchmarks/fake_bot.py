@@ -0,0 +1,51 @@
+from collections import Counter
+from datetime import datetime
+from itertools import count
+from typing import Any, AsyncGenerator, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod, GetChatMemberCount, GetMe, CopyMessage, SendMessage, SendPhoto, \
+    SendVideo, SendAnimation, EditMessageText
+from aiogram.types import Message, Chat, User, MessageId
+
+MESSAGE_METHODS = (SendMessage, SendPhoto, SendVideo, SendAnimation, EditMessageText)
+
+
+class FakeSession(BaseSession):
+    def __init__(self):
+        super().__init__()
+        self.requests = Counter()
+        self.message_ids = count(1)
+
+    def build_result(self, method: TelegramMethod) -> Any:
+        if isinstance(method, MESSAGE_METHODS):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self.message_ids),
+                date=datetime.now(),
+                chat=Chat(id=int(chat_id) if str(chat_id).lstrip("-").isdigit() else 0, type="private"),
+                text=getattr(method, "text", None)
+            )
+
+        if isinstance(method, GetChatMemberCount):
+            return 1000
+
+        if isinstance(method, CopyMessage):
+            return MessageId(message_id=next(self.message_ids))
+
+        if isinstance(method, GetMe):
+            return User(id=1, is_bot=True, first_name="Benchmark")
+
+        return True
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.requests[type(method).__name__] += 1
+        return self.build_result(method)
+
+    async def stream_content(self, url: str, headers: Optional[dict] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
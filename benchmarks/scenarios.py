@@ -0,0 +1,273 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.types import Update
+
+from api.catalog import catalog
+from benchmarks.backend import FakeBackend
+from benchmarks.fake_bot import FakeSession
+from benchmarks.stats import HandlerTimingMiddleware, summarize
+from benchmarks.updates import message_update, group_message_update, web_app_update, callback_update
+from bot import create_dispatcher
+from config_reader import config
+from database.engine import session_maker, engine, fsm_engine, pool_stats
+from database.message_buffer import message_buffer
+from database.models import Role
+from database.orm_queries import add_user, add_group, add_post
+from keyboards.admin import PaginationCbData
+from keyboards.vendor import SubjectCbData, CityCbData, GroupCbData
+
+PRICE = {"withoutPin": 10, "withPin": 15}
+
+
+class BenchmarkGroup:
+    def __init__(self, backend_id: int, telegram_id: int, subject_id: int, city_id: int):
+        self.backend_id = backend_id
+        self.telegram_id = telegram_id
+        self.subject_id = subject_id
+        self.city_id = city_id
+
+
+class BenchmarkVendor:
+    def __init__(self, telegram_id: int, groups: List[BenchmarkGroup]):
+        self.telegram_id = telegram_id
+        self.groups = groups
+
+
+class Dataset:
+    def __init__(self, admin_id: int, vendors: List[BenchmarkVendor], users_count: int):
+        self.admin_id = admin_id
+        self.vendors = vendors
+        self.users_count = users_count
+
+
+def seed_catalog(backend: FakeBackend, subjects_count: int, cities_per_subject: int) -> List[dict]:
+    cities = []
+    for subject_index in range(subjects_count):
+        subject = backend.add("subject", {"name": f"Subject {subject_index}"})
+        for city_index in range(cities_per_subject):
+            cities.append(backend.add("city", {"name": f"City {subject_index}.{city_index}",
+                                               "subjectId": subject["id"]}))
+
+    return cities
+
+
+async def seed_database(backend: FakeBackend, cities: List[dict], vendors_count: int,
+                        groups_per_vendor: int) -> Dataset:
+    admin_id = next(iter(config.ADMIN_TELEGRAM_IDS))
+    vendors = []
+    async with session_maker() as session:
+        await add_user(session, str(admin_id), "Admin", None, "admin", role=Role.ADMIN, allowed_groups_count=100)
+
+        for vendor_index in range(vendors_count):
+            telegram_id = 10_000 + vendor_index
+            user = await add_user(session, str(telegram_id), "Vendor", str(vendor_index), f"vendor{vendor_index}",
+                                  role=Role.VENDOR, allowed_groups_count=groups_per_vendor)
+            groups = []
+            for group_index in range(groups_per_vendor):
+                city = cities[(vendor_index + group_index) % len(cities)]
+                group_telegram_id = -1_000_000_000_000 - vendor_index * 1000 - group_index
+                group_local = await add_group(session, user.id, str(group_telegram_id), city_id=city["id"],
+                                              subject_id=city["subjectId"])
+                await add_post(session, group_local.id, 100)
+                backend_group = backend.add("group", {
+                    "name": f"Group {vendor_index}.{group_index}",
+                    "groupTelegramId": str(group_telegram_id),
+                    "userTelegramId": str(telegram_id),
+                    "cityId": city["id"],
+                    "workingHoursStart": "00:00",
+                    "workingHoursEnd": "00:00",
+                    "postIntervalInMinutes": 60,
+                    "link": None,
+                    "priceForOneDay": PRICE,
+                    "priceForOneWeek": PRICE,
+                    "priceForTwoWeeks": PRICE,
+                    "priceForOneMonth": PRICE,
+                    "averagePostViews": 0
+                })
+                groups.append(BenchmarkGroup(backend_group["id"], group_telegram_id, city["subjectId"], city["id"]))
+
+            vendors.append(BenchmarkVendor(telegram_id, groups))
+
+    return Dataset(admin_id, vendors, vendors_count + 1)
+
+
+def group_flood(dataset: Dataset, args) -> List[List[dict]]:
+    chats = [group.telegram_id for vendor in dataset.vendors for group in vendor.groups]
+    sequences = []
+    for index in range(args.messages):
+        if index % 10 == 9:
+            chat_id = -2_000_000_000_000 - index % 100
+        else:
+            chat_id = chats[index % len(chats)]
+
+        sequences.append([group_message_update(chat_id, 50_000 + index % 500)])
+
+    return sequences
+
+
+def choose_group_updates(vendor: BenchmarkVendor, group: BenchmarkGroup) -> List[dict]:
+    return [
+        callback_update(vendor.telegram_id, SubjectCbData(subject_id=group.subject_id).pack()),
+        callback_update(vendor.telegram_id, CityCbData(city_id=group.city_id).pack()),
+        callback_update(vendor.telegram_id, GroupCbData(group_id=group.backend_id).pack())
+    ]
+
+
+def vendor_menu(dataset: Dataset, args) -> List[List[dict]]:
+    sequences = []
+    for vendor in dataset.vendors:
+        sequence = []
+        for round_index in range(args.rounds):
+            group = vendor.groups[round_index % len(vendor.groups)]
+            sequence.append(message_update(vendor.telegram_id, "💬 Мои группы"))
+            sequence.extend(choose_group_updates(vendor, group))
+            sequence.append(message_update(vendor.telegram_id, "Отменить"))
+
+        sequences.append(sequence)
+
+    return sequences
+
+
+def build_calendar(slots_count: int) -> str:
+    start = datetime.now().date() + timedelta(days=1)
+    posts = [{
+        "date": (start + timedelta(days=index // 4)).strftime("%Y-%m-%d"),
+        "time": f"{10 + index % 4 * 2:02}:00:00",
+        "withPin": index % 2 == 0
+    } for index in range(slots_count)]
+    return json.dumps({"posts": posts, "totalPrice": 10 * slots_count})
+
+
+def post_creation(dataset: Dataset, args) -> List[List[dict]]:
+    sequences = []
+    for vendor in dataset.vendors:
+        sequence = []
+        for round_index in range(args.rounds):
+            group = vendor.groups[round_index % len(vendor.groups)]
+            sequence.append(message_update(vendor.telegram_id, "✏️ Создать объявление"))
+            sequence.extend(choose_group_updates(vendor, group))
+            sequence.append(web_app_update(vendor.telegram_id, build_calendar(args.post_slots)))
+            sequence.append(message_update(vendor.telegram_id, "Benchmark post"))
+            sequence.append(message_update(vendor.telegram_id, "Пропустить"))
+            sequence.append(message_update(vendor.telegram_id, "Подтвердить"))
+
+        sequences.append(sequence)
+
+    return sequences
+
+
+def statistics(dataset: Dataset, args) -> List[List[dict]]:
+    sequences = []
+    for vendor in dataset.vendors:
+        sequence = []
+        for round_index in range(args.rounds):
+            group = vendor.groups[round_index % len(vendor.groups)]
+            sequence.append(message_update(vendor.telegram_id, "📊 Статистика"))
+            sequence.append(message_update(vendor.telegram_id, "Общая"))
+            sequence.append(message_update(vendor.telegram_id, "📊 Статистика"))
+            sequence.append(message_update(vendor.telegram_id, "Выбрать группу"))
+            sequence.extend(choose_group_updates(vendor, group))
+
+        sequences.append(sequence)
+
+    return sequences
+
+
+def admin_users(dataset: Dataset, args) -> List[List[dict]]:
+    last_page = max((dataset.users_count - 1) // config.PAGE_LIMIT, 0)
+    sequence = []
+    for _ in range(args.rounds):
+        sequence.append(message_update(dataset.admin_id, "👤 Пользователи"))
+        sequence.append(callback_update(dataset.admin_id, PaginationCbData(page=last_page, backward=True).pack()))
+        sequence.append(callback_update(dataset.admin_id, PaginationCbData(page=0).pack()))
+
+    return [sequence]
+
+
+SCENARIOS = {
+    "group_flood": group_flood,
+    "vendor_menu": vendor_menu,
+    "post_creation": post_creation,
+    "statistics": statistics,
+    "admin_users": admin_users
+}
+
+
+async def run_scenario(dispatcher, bot: Bot, timing: HandlerTimingMiddleware, sequences: List[List[dict]],
+                       concurrency: int) -> dict:
+    latencies = []
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_sequence(sequence: List[dict]):
+        async with semaphore:
+            for raw_update in sequence:
+                update = Update.model_validate(raw_update, context={"bot": bot})
+                started = time.perf_counter()
+                try:
+                    await dispatcher.feed_update(bot, update)
+
+                except Exception as ex:
+                    errors.append(repr(ex))
+
+                latencies.append(time.perf_counter() - started)
+
+    timing.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_sequence(sequence) for sequence in sequences))
+    duration = time.perf_counter() - started
+
+    flush_started = time.perf_counter()
+    await message_buffer.flush()
+
+    return {
+        "updates": len(latencies),
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "duration_s": duration,
+        "updates_per_sec": len(latencies) / duration if duration else 0,
+        "latency": summarize(latencies),
+        "handlers": {name: summarize(values) for name, values in sorted(timing.reset().items())},
+        "final_flush_ms": (time.perf_counter() - flush_started) * 1000
+    }
+
+
+async def run_benchmark(backend: FakeBackend, args) -> dict:
+    cities = seed_catalog(backend, args.subjects, args.cities_per_subject)
+
+    fake_session = FakeSession()
+    bot = Bot(token=config.BOT_API_TOKEN.get_secret_value(), session=fake_session)
+    dispatcher = create_dispatcher()
+    timing = HandlerTimingMiddleware()
+    dispatcher.message.middleware(timing)
+    dispatcher.callback_query.middleware(timing)
+
+    workflow_data = {"dispatcher": dispatcher, "bot": bot, **dispatcher.workflow_data, "drop_database": False}
+    await dispatcher.emit_startup(**workflow_data)
+    try:
+        dataset = await seed_database(backend, cities, args.vendors, args.groups_per_vendor)
+        catalog.invalidate()
+
+        results: Dict[str, dict] = {}
+        for name in args.scenarios:
+            sequences = SCENARIOS[name](dataset, args)
+            concurrency = args.concurrency if name == "group_flood" else len(sequences)
+            results[name] = await run_scenario(dispatcher, bot, timing, sequences, concurrency)
+
+        return {
+            "scenarios": results,
+            "message_buffer": message_buffer.stats(),
+            "db_pool": pool_stats.to_dict(),
+            "backend_requests": dict(backend.requests),
+            "telegram_requests": dict(fake_session.requests)
+        }
+
+    finally:
+        await dispatcher.emit_shutdown(**workflow_data)
+        await engine.dispose()
+        await fsm_engine.dispose()
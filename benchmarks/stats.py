@@ -0,0 +1,49 @@
+import math
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+def percentile(values: List[float], rank: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(latencies: List[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0) * 1000
+    }
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        name = f"{callback.__module__}.{callback.__name__}"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+
+    def reset(self) -> Dict[str, List[float]]:
+        latencies, self.latencies = self.latencies, defaultdict(list)
+        return latencies
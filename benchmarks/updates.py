@@ -0,0 +1,46 @@
+import time
+from itertools import count
+
+update_ids = count(1)
+message_ids = count(1)
+
+
+def user_dict(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+
+
+def message_dict(chat_id: int, user_id: int, text: str = None, chat_type: str = "private", **extra) -> dict:
+    chat = {"id": chat_id, "type": chat_type}
+    if chat_type != "private":
+        chat["title"] = f"Group {chat_id}"
+
+    message = {"message_id": next(message_ids), "date": int(time.time()), "chat": chat, "from": user_dict(user_id)}
+    if text is not None:
+        message["text"] = text
+
+    message.update(extra)
+    return message
+
+
+def message_update(user_id: int, text: str) -> dict:
+    return {"update_id": next(update_ids), "message": message_dict(user_id, user_id, text)}
+
+
+def group_message_update(chat_id: int, user_id: int, text: str = "Hello") -> dict:
+    return {"update_id": next(update_ids), "message": message_dict(chat_id, user_id, text, chat_type="supergroup")}
+
+
+def web_app_update(user_id: int, data: str) -> dict:
+    return {"update_id": next(update_ids), "message": message_dict(
+        user_id, user_id, web_app_data={"data": data, "button_text": "Календарь"}
+    )}
+
+
+def callback_update(user_id: int, data: str) -> dict:
+    return {"update_id": next(update_ids), "callback_query": {
+        "id": str(next(update_ids)),
+        "from": user_dict(user_id),
+        "chat_instance": "benchmark",
+        "message": message_dict(user_id, user_id, "Benchmark"),
+        "data": data
+    }}
@@ -1,61 +1,205 @@
 import argparse
 import asyncio
 import logging
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
 
 from aiogram import Bot, Dispatcher
 
+from api.catalog import catalog
+from api.client import ApiClient, open_http_session, close_http_session
+from api.response_cache import response_cache
 from config_reader import config
-from database.engine import drop_db, create_db, session_maker
+from database.broadcaster import broadcaster
+from database.engine import drop_db, session_maker, fsm_session_maker, pool_stats
+from database.fsm_storage import SQLStorage
+from database.group_registry import group_registry
+from database.member_counts import member_counts
+from database.message_buffer import message_buffer
+from database.migrations import ensure_schema
+from database.partitions import maintain_partitions, partition_maintainer
+from database.cache import user_cache, users_count_cache
+from database.models import User, Role
 from handlers import admin, vendor, group
 from middlewares.db import DatabaseSessionMiddleware
+from middlewares.metrics import UpdateMetricsMiddleware, HandlerMetricsMiddleware
+from utils.metrics import registry, start_metrics_server
+from utils.telegram_session import RateLimitedSession, bulk_sends
+from webhook import run_webhook
 
 
-async def on_startup(bot: Bot) -> None:
+def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument("--drop-database", action="store_true")
     parser.add_argument("--no-drop-database", action="store_false")
-    args = parser.parse_args()
+    parser.add_argument("--webhook", action="store_true", help="Receive updates through a webhook instead of polling")
+    return parser.parse_args()
 
-    if args.drop_database:
-        await drop_db()
 
-    await create_db()
+background_tasks = set()
 
-    for admin_telegram_id in config.ADMIN_TELEGRAM_IDS:
-        await bot.send_message(admin_telegram_id, "Бот запущен")
 
+def run_in_background(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
-async def on_shutdown(bot: Bot) -> None:
-    for admin_telegram_id in config.ADMIN_TELEGRAM_IDS:
-        await bot.send_message(admin_telegram_id, "Бот остановлен")
 
+@contextmanager
+def timed_phase(phases: List[Tuple[str, float]], name: str):
+    started = time.perf_counter()
+    try:
+        yield
 
-async def main():
-    logging.basicConfig(level=logging.INFO)
+    finally:
+        phases.append((name, time.perf_counter() - started))
 
-    file_handler = logging.FileHandler("bot.log")
-    file_handler.setLevel(logging.INFO)
 
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
-    file_handler.setFormatter(formatter)
+async def notify_admins(bot: Bot, text: str):
+    with bulk_sends():
+        results = await asyncio.gather(*(bot.send_message(admin_telegram_id, text)
+                                         for admin_telegram_id in config.ADMIN_TELEGRAM_IDS), return_exceptions=True)
 
-    logger = logging.getLogger()
-    logger.addHandler(file_handler)
+    for admin_telegram_id, result in zip(config.ADMIN_TELEGRAM_IDS, results):
+        if isinstance(result, Exception):
+            logging.warning("Failed to notify admin %s: %s", admin_telegram_id, result)
+
+
+async def warm_up_catalog():
+    try:
+        await catalog.load(ApiClient(User(role=Role.ADMIN)))
+
+    except Exception:
+        logging.exception("Failed to warm up the subjects and cities catalog")
+
+
+async def load_group_registry():
+    async with session_maker() as session:
+        await group_registry.load(session)
+
+
+async def on_startup(bot: Bot, dispatcher: Dispatcher, drop_database: bool = False) -> None:
+    phases = []
+
+    if drop_database:
+        with timed_phase(phases, "drop database"):
+            await drop_db()
+
+    with timed_phase(phases, "schema"):
+        schema_status = await ensure_schema()
+
+    with timed_phase(phases, "partitions"):
+        await maintain_partitions(retention_days=None)
+
+    with timed_phase(phases, "registries"):
+        await asyncio.gather(load_group_registry(), member_counts.load())
+
+    with timed_phase(phases, "background services"):
+        await open_http_session()
+        message_buffer.start()
+        member_counts.start(bot)
+        group_registry.start(session_maker)
+        broadcaster.start_watching(bot)
+        partition_maintainer.start()
+
+    if isinstance(dispatcher.storage, SQLStorage):
+        run_in_background(dispatcher.storage.purge_expired())
+
+    run_in_background(warm_up_catalog())
+    run_in_background(notify_admins(bot, "Бот запущен"))
+
+    logging.info("Startup finished in %.1f ms (schema %s): %s", sum(duration for _, duration in phases) * 1000,
+                 schema_status, ", ".join(f"{name} {duration * 1000:.1f} ms" for name, duration in phases))
 
-    bot = Bot(token=config.BOT_API_TOKEN.get_secret_value())
-    dp = Dispatcher()
+
+async def on_shutdown(bot: Bot) -> None:
+    for task in list(background_tasks):
+        task.cancel()
+
+    await broadcaster.stop()
+    await partition_maintainer.stop()
+    await message_buffer.stop()
+    await member_counts.stop()
+    await group_registry.stop()
+
+    await notify_admins(bot, "Бот остановлен")
+
+    await close_http_session()
+
+
+def create_dispatcher() -> Dispatcher:
+    storage = SQLStorage(fsm_session_maker, ttl=config.FSM_STATE_TTL) if config.FSM_STORAGE == "sql" else None
+    dp = Dispatcher(storage=storage)
 
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
 
-    dp.update.middleware(DatabaseSessionMiddleware(session_pool=session_maker))
+    database_middleware = DatabaseSessionMiddleware(session_pool=session_maker)
+
+    if config.METRICS_ENABLED:
+        dp.update.outer_middleware(UpdateMetricsMiddleware(registry))
+        handler_metrics = HandlerMetricsMiddleware(registry)
+        dp.message.middleware(handler_metrics)
+        dp.callback_query.middleware(handler_metrics)
+
+        registry.add_stats("bot_db_sessions", database_middleware.stats.to_dict)
+        registry.add_stats("bot_db_pool", pool_stats.to_dict)
+        registry.add_stats("bot_message_buffer", message_buffer.stats)
+        registry.add_stats("bot_member_counts", member_counts.stats)
+        registry.add_stats("bot_user_cache", user_cache.stats)
+        registry.add_stats("bot_users_count_cache", users_count_cache.stats)
+        registry.add_stats("bot_api_cache", response_cache.stats)
+
+    dp.update.middleware(database_middleware)
 
     dp.include_router(admin.router)
     dp.include_router(vendor.router)
     dp.include_router(group.router)
+    return dp
+
+
+async def main():
+    args = parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    file_handler = logging.FileHandler("bot.log")
+    file_handler.setLevel(logging.INFO)
+
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    file_handler.setFormatter(formatter)
+
+    logger = logging.getLogger()
+    logger.addHandler(file_handler)
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    session = RateLimitedSession(
+        global_rate=config.TELEGRAM_GLOBAL_RATE,
+        private_chat_rate=config.TELEGRAM_PRIVATE_CHAT_RATE,
+        group_chat_rate=config.TELEGRAM_GROUP_CHAT_RATE,
+        chat_burst=config.TELEGRAM_CHAT_BURST,
+        max_retries=config.TELEGRAM_MAX_RETRIES
+    )
+    bot = Bot(token=config.BOT_API_TOKEN.get_secret_value(), session=session)
+    dp = create_dispatcher()
+
+    allowed_updates = dp.resolve_used_update_types()
+
+    metrics_runner = None
+    if config.METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(registry, config.METRICS_HOST, config.METRICS_PORT)
+        logging.info("Metrics are exposed on http://%s:%s/metrics", config.METRICS_HOST, config.METRICS_PORT)
+
+    try:
+        if args.webhook:
+            return await run_webhook(dp, bot, allowed_updates, drop_database=args.drop_database)
+
+        await bot.delete_webhook(drop_pending_updates=config.DROP_PENDING_UPDATES)
+        await dp.start_polling(bot, allowed_updates=allowed_updates, drop_database=args.drop_database)
+
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from typing import Set
+from typing import Set, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr
@@ -8,11 +8,70 @@ class Settings(BaseSettings):
     API_BASE_URL: str
     BOT_API_TOKEN: SecretStr
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_WAIT_WARNING_MS: float = 100
     ADMIN_TELEGRAM_IDS: Set[int]
     DEFAULT_CLIENT_MESSAGE: str
     PAGE_LIMIT: int = 10
     CALENDAR_URL: str
     GENERAL_CHANNEL_TELEGRAM_ID: str
+    DROP_PENDING_UPDATES: bool = False
+    WEBHOOK_URL: Optional[str] = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_SECRET: Optional[SecretStr] = None
+    WEBHOOK_WORKERS: int = 16
+    WEBHOOK_QUEUE_SIZE: int = 1000
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    API_POOL_SIZE: int = 100
+    API_KEEPALIVE_TIMEOUT: float = 30
+    API_TIMEOUT: float = 15
+    API_CONNECT_TIMEOUT: float = 5
+    API_BULK_CONCURRENCY: int = 10
+    API_CACHE_ENDPOINTS: Set[str] = set()
+    API_CACHE_TTL: float = 30
+    API_CACHE_STALE_TTL: float = 600
+    API_CACHE_SIZE: int = 1000
+    MESSAGE_BUFFER_FLUSH_SIZE: int = 500
+    MESSAGE_BUFFER_FLUSH_INTERVAL_MS: int = 1000
+    MESSAGE_BUFFER_MAX_ROWS: int = 50000
+    MESSAGE_BUFFER_MAX_RETRIES: int = 5
+    MESSAGE_RETENTION_DAYS: int = 30
+    MESSAGE_PARTITIONS_AHEAD_DAYS: int = 7
+    MESSAGE_PARTITION_MAINTENANCE_INTERVAL: float = 6 * 60 * 60
+    FSM_STORAGE: str = "sql"
+    FSM_STATE_TTL: float = 7 * 24 * 60 * 60
+    FSM_DB_POOL_SIZE: int = 2
+    FSM_DB_MAX_OVERFLOW: int = 3
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 300
+    USERS_COUNT_CACHE_TTL: float = 60
+    CATALOG_CACHE_TTL: float = 3600
+    GROUP_CARD_CACHE_SIZE: int = 1000
+    GROUP_CARD_CACHE_TTL: float = 120
+    GROUP_REGISTRY_UNKNOWN_CHATS_SIZE: int = 10000
+    GROUP_REGISTRY_UNKNOWN_CHATS_TTL: float = 60
+    GROUP_REGISTRY_RELOAD_INTERVAL: float = 5 * 60
+    MEMBER_COUNT_REFRESH_INTERVAL: float = 60 * 60
+    MEMBER_COUNT_REFRESH_RATE: float = 5
+    MEMBER_COUNT_BATCH_SIZE: int = 100
+    BROADCAST_CHUNK_SIZE: int = 100
+    BROADCAST_CONCURRENCY: int = 10
+    BROADCAST_LEASE: float = 5 * 60
+    TELEGRAM_GLOBAL_RATE: float = 30
+    TELEGRAM_PRIVATE_CHAT_RATE: float = 1
+    TELEGRAM_GROUP_CHAT_RATE: float = 20 / 60
+    TELEGRAM_CHAT_BURST: float = 3
+    TELEGRAM_MAX_RETRIES: int = 3
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9090
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
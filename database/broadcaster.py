@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import socket
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config_reader import config
+from database.engine import session_maker
+from database.models import Broadcast, BroadcastStatus
+from database.orm_queries import find_broadcast_recipients, get_broadcast, find_running_broadcasts, claim_broadcast, \
+    release_broadcasts
+from keyboards.admin import broadcast_status_kb
+from utils.telegram_session import bulk_sends
+
+logger = logging.getLogger(__name__)
+
+STATUS_TITLES = {
+    BroadcastStatus.RUNNING: "Рассылка идет",
+    BroadcastStatus.FINISHED: "Рассылка завершена",
+    BroadcastStatus.CANCELLED: "Рассылка остановлена"
+}
+
+
+def get_broadcast_status_text(broadcast: Broadcast) -> str:
+    processed = broadcast.sent + broadcast.failed + broadcast.blocked
+    return (f"{STATUS_TITLES[broadcast.status]}\n\n"
+            f"Обработано: {processed}/{broadcast.recipients_count}\n"
+            f"Доставлено: {broadcast.sent}\n"
+            f"Заблокировали бота: {broadcast.blocked}\n"
+            f"Ошибки: {broadcast.failed}")
+
+
+class Broadcaster:
+    def __init__(self, session_pool: async_sessionmaker, chunk_size: int, concurrency: int, lease: float):
+        self.session_pool = session_pool
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.watcher: Optional[asyncio.Task] = None
+
+    def start(self, bot: Bot, broadcast_id: int):
+        if broadcast_id not in self.tasks:
+            task = asyncio.create_task(self.run(bot, broadcast_id))
+            task.add_done_callback(lambda done_task: self.on_task_done(broadcast_id, done_task))
+            self.tasks[broadcast_id] = task
+
+    def on_task_done(self, broadcast_id: int, task: asyncio.Task):
+        self.tasks.pop(broadcast_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Broadcast %s failed, it will be resumed on the next check", broadcast_id,
+                         exc_info=task.exception())
+
+    async def resume(self, bot: Bot):
+        async with self.session_pool() as session:
+            broadcasts = await find_running_broadcasts(session)
+
+        now = datetime.now()
+        for broadcast in broadcasts:
+            if broadcast.id in self.tasks:
+                continue
+
+            if broadcast.lease_owner not in (None, self.owner) and broadcast.lease_expires_at >= now:
+                continue
+
+            logger.info("Resuming broadcast %s after user %s", broadcast.id, broadcast.last_user_id)
+            self.start(bot, broadcast.id)
+
+    def start_watching(self, bot: Bot):
+        if self.watcher is None:
+            self.watcher = asyncio.create_task(self.watch(bot))
+
+    async def watch(self, bot: Bot):
+        while True:
+            try:
+                await self.resume(bot)
+
+            except Exception:
+                logger.exception("Failed to resume broadcasts")
+
+            await asyncio.sleep(self.lease)
+
+    async def cancel(self, broadcast_id: int):
+        task = self.tasks.get(broadcast_id)
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def stop(self):
+        if self.watcher is not None:
+            self.watcher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.watcher
+
+            self.watcher = None
+
+        for broadcast_id in list(self.tasks):
+            await self.cancel(broadcast_id)
+
+        async with self.session_pool() as session:
+            await release_broadcasts(session, self.owner)
+
+    async def run(self, bot: Bot, broadcast_id: int):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.session_pool() as session:
+            if not await claim_broadcast(session, broadcast_id, self.owner, self.lease):
+                return
+
+            broadcast = await get_broadcast(session, broadcast_id)
+            while broadcast is not None and broadcast.status == BroadcastStatus.RUNNING:
+                recipients = await find_broadcast_recipients(session, broadcast.audience, broadcast.last_user_id,
+                                                             self.chunk_size)
+                if not recipients:
+                    broadcast.status = BroadcastStatus.FINISHED
+                    await session.commit()
+                    break
+
+                await session.commit()
+                results = await asyncio.gather(*(self.send(bot, broadcast, telegram_id, semaphore)
+                                                 for _, telegram_id in recipients))
+
+                await session.refresh(broadcast, with_for_update=True)
+                if broadcast.lease_owner != self.owner:
+                    logger.warning("Broadcast %s was taken over by %s", broadcast.id, broadcast.lease_owner)
+                    await session.rollback()
+                    return
+
+                for result in results:
+                    setattr(broadcast, result, getattr(broadcast, result) + 1)
+
+                broadcast.last_user_id = recipients[-1][0]
+                broadcast.lease_expires_at = datetime.now() + timedelta(seconds=self.lease)
+                await session.commit()
+                await self.report(bot, broadcast)
+
+            if broadcast is not None:
+                await self.report(bot, broadcast)
+
+    @staticmethod
+    async def send(bot: Bot, broadcast: Broadcast, telegram_id: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            try:
+                with bulk_sends():
+                    await bot.copy_message(chat_id=telegram_id, from_chat_id=broadcast.from_chat_id,
+                                           message_id=broadcast.message_id)
+
+                return "sent"
+
+            except TelegramForbiddenError:
+                return "blocked"
+
+            except TelegramAPIError as ex:
+                logger.debug("Broadcast %s to %s failed: %s", broadcast.id, telegram_id, ex)
+                return "failed"
+
+    @staticmethod
+    async def report(bot: Bot, broadcast: Broadcast):
+        if broadcast.status_message_id is None:
+            return
+
+        reply_markup = broadcast_status_kb(broadcast.id) if broadcast.status == BroadcastStatus.RUNNING else None
+        with suppress(TelegramBadRequest):
+            await bot.edit_message_text(
+                text=get_broadcast_status_text(broadcast),
+                chat_id=broadcast.from_chat_id,
+                message_id=broadcast.status_message_id,
+                reply_markup=reply_markup
+            )
+
+
+broadcaster = Broadcaster(session_maker, chunk_size=config.BROADCAST_CHUNK_SIZE,
+                          concurrency=config.BROADCAST_CONCURRENCY, lease=config.BROADCAST_LEASE)
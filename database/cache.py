@@ -0,0 +1,22 @@
+from typing import Dict
+
+from config_reader import config
+from database.models import Role
+from utils.cache import TTLCache
+
+
+class CachedUser:
+    def __init__(self, _id: int, telegram_id: str, role: Role, allowed_groups_count: int, groups_count: int):
+        self.id = _id
+        self.telegram_id = telegram_id
+        self.role = role
+        self.allowed_groups_count = allowed_groups_count
+        self.groups_count = groups_count
+
+
+# Maps user ids to the telegram ids the users are cached under, and only holds users that are in user_cache.
+user_telegram_ids: Dict[int, str] = {}
+user_cache = TTLCache(max_size=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL,
+                      on_remove=lambda _, cached_user: user_telegram_ids.pop(cached_user.id, None))
+users_count_cache = TTLCache(max_size=1, ttl=config.USERS_COUNT_CACHE_TTL)
+group_card_cache = TTLCache(max_size=config.GROUP_CARD_CACHE_SIZE, ttl=config.GROUP_CARD_CACHE_TTL)
@@ -1,13 +1,102 @@
+import logging
+import time
+
+from sqlalchemy import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from database.models import Base
 
 from config_reader import config
 
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    def __init__(self, wait_warning_ms: float):
+        self.wait_warning = wait_warning_ms / 1000
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.slow_waits = 0
+
+    def on_wait(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait >= self.wait_warning:
+            self.slow_waits += 1
+            logger.warning("Waited %.1f ms for a database connection", wait * 1000)
+
+    def to_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "slow_waits": self.slow_waits,
+            "avg_wait": self.total_wait / self.checkouts if self.checkouts else 0,
+            "max_wait": self.max_wait,
+            "checked_out": engine.pool.checkedout(),
+            "overflow": engine.pool.overflow()
+        }
+
+
+pool_stats = PoolStats(wait_warning_ms=config.DB_POOL_WAIT_WARNING_MS)
+
 
-engine = create_async_engine(config.DATABASE_URL, echo=False)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+
+        finally:
+            pool_stats.on_wait(time.perf_counter() - started)
+
+
+def get_connect_args() -> dict:
+    if make_url(config.DATABASE_URL).get_driver_name() != "asyncpg":
+        return {}
+
+    return {
+        "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE
+    }
+
+
+engine = create_async_engine(
+    config.DATABASE_URL,
+    echo=False,
+    poolclass=TimedQueuePool,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    connect_args=get_connect_args()
+)
 session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Handlers keep their connection for the whole update and read or write the FSM state in the middle of it. Taking
+# that second connection from the same pool deadlocks once every connection is held by a handler waiting for one,
+# so the FSM storage gets a pool of its own.
+fsm_engine = create_async_engine(
+    config.DATABASE_URL,
+    echo=False,
+    pool_size=config.FSM_DB_POOL_SIZE,
+    max_overflow=config.FSM_DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    connect_args=get_connect_args()
+)
+fsm_session_maker = async_sessionmaker(bind=fsm_engine, class_=AsyncSession, expire_on_commit=False)
+
 
 async def create_db():
     async with engine.begin() as connection:
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from sqlalchemy import select, delete, case, cast, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from api.enums import PublicationType, PostStatus
+from api.views import PriceView, ButtonView
+from database.models import FsmState
+
+OBJECT_TYPES = {cls.__name__: cls for cls in (PriceView, ButtonView)}
+ENUM_TYPES = {cls.__name__: cls for cls in (PublicationType, PostStatus)}
+
+
+def encode_state_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Enum) and type(value).__name__ in ENUM_TYPES:
+        return {"__enum__": type(value).__name__, "value": value.value}
+
+    if type(value).__name__ in OBJECT_TYPES:
+        return {"__object__": type(value).__name__, "fields": encode_state_value(vars(value))}
+
+    if isinstance(value, (list, tuple)):
+        return [encode_state_value(item) for item in value]
+
+    if isinstance(value, dict):
+        if all(isinstance(item_key, str) for item_key in value):
+            return {item_key: encode_state_value(item) for item_key, item in value.items()}
+
+        return {"__items__": [[encode_state_value(item_key), encode_state_value(item)]
+                              for item_key, item in value.items()]}
+
+    raise TypeError(f"Cannot store {type(value).__name__} in FSM state")
+
+
+def decode_state_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode_state_value(item) for item in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    if "__enum__" in value:
+        return ENUM_TYPES[value["__enum__"]](value["value"])
+
+    if "__object__" in value:
+        instance = object.__new__(OBJECT_TYPES[value["__object__"]])
+        vars(instance).update(decode_state_value(value["fields"]))
+        return instance
+
+    if "__items__" in value:
+        return {decode_state_value(item_key): decode_state_value(item) for item_key, item in value["__items__"]}
+
+    return {item_key: decode_state_value(item) for item_key, item in value.items()}
+
+
+class SQLStorage(BaseStorage):
+    def __init__(self, session_pool: async_sessionmaker, ttl: float):
+        self.session_pool = session_pool
+        self.ttl = timedelta(seconds=ttl)
+
+    @staticmethod
+    def is_private(key: StorageKey) -> bool:
+        # Dialogs only run in private chats, whose ids are the user ids. Group chats have negative ids and are read
+        # on every group message, so they never reach the database.
+        return key.chat_id > 0
+
+    @staticmethod
+    def build_key(key: StorageKey) -> str:
+        parts = [str(key.bot_id), str(key.chat_id), str(key.user_id)]
+        if key.thread_id:
+            parts.append(f"thread={key.thread_id}")
+
+        if key.business_connection_id:
+            parts.append(f"business={key.business_connection_id}")
+
+        parts.append(key.destiny)
+        return ":".join(parts)
+
+    async def upsert(self, session: AsyncSession, key: StorageKey, **values):
+        now = datetime.now()
+        expired = FsmState.expires_at <= now
+        query = pg_insert(FsmState).values(
+            key=self.build_key(key),
+            state=values.get("state"),
+            data=values.get("data", {}),
+            expires_at=now + self.ttl,
+            created_at=now,
+            updated_at=now
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[FsmState.key],
+            set_={
+                "state": query.excluded.state if "state" in values else case((expired, None),
+                                                                            else_=FsmState.state),
+                "data": query.excluded.data if "data" in values else case((expired, cast(literal("{}"), JSONB)),
+                                                                          else_=FsmState.data),
+                "expires_at": query.excluded.expires_at,
+                "updated_at": query.excluded.updated_at
+            }
+        )
+        await session.execute(query)
+
+    async def get_row(self, session: AsyncSession, key: StorageKey, for_update: bool = False) -> Optional[FsmState]:
+        query = select(FsmState).where(FsmState.key == self.build_key(key), FsmState.expires_at > datetime.now())
+        if for_update:
+            query = query.with_for_update()
+
+        result = await session.execute(query)
+        return result.scalars().first()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        async with self.session_pool() as session:
+            await self.upsert(session, key, state=state.state if isinstance(state, State) else state)
+            await session.commit()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        if not self.is_private(key):
+            return None
+
+        async with self.session_pool() as session:
+            row = await self.get_row(session, key)
+            return row.state if row else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        async with self.session_pool() as session:
+            await self.upsert(session, key, data=encode_state_value(data))
+            await session.commit()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        if not self.is_private(key):
+            return {}
+
+        async with self.session_pool() as session:
+            row = await self.get_row(session, key)
+            return decode_state_value(row.data) if row else {}
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.session_pool() as session:
+            row = await self.get_row(session, key, for_update=True)
+            current_data = decode_state_value(row.data) if row else {}
+            current_data.update(data)
+            await self.upsert(session, key, data=encode_state_value(current_data))
+            await session.commit()
+            return current_data
+
+    async def purge_expired(self) -> int:
+        async with self.session_pool() as session:
+            result = await session.execute(delete(FsmState).where(FsmState.expires_at <= datetime.now()))
+            await session.commit()
+            return result.rowcount
+
+    async def close(self) -> None:
+        pass
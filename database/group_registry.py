@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config_reader import config
+from database.models import Group, User, Role
+from utils.cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+
+class GroupRegistry:
+    def __init__(self, unknown_chats_size: int, unknown_chats_ttl: float, reload_interval: float):
+        self.groups: Dict[str, Dict[int, int]] = {}
+        self.roles: Dict[int, Role] = {}
+        self.unknown_chats = TTLCache(max_size=unknown_chats_size, ttl=unknown_chats_ttl)
+        self.reload_interval = reload_interval
+        self.task: Optional[asyncio.Task] = None
+
+    async def load(self, session: AsyncSession):
+        query = select(Group.id, Group.telegram_id, Group.user_id, User.role).join(User, Group.user_id == User.id)
+        result = await session.execute(query)
+
+        self.groups = {}
+        self.roles = {}
+        for group_id, telegram_id, user_id, role in result.all():
+            self.groups.setdefault(telegram_id, {})[group_id] = user_id
+            self.roles[user_id] = role
+
+        self.unknown_chats.clear()
+
+    def start(self, session_pool: async_sessionmaker):
+        if self.task is None and self.reload_interval > 0:
+            self.task = asyncio.create_task(self.run(session_pool))
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+
+            self.task = None
+
+    async def run(self, session_pool: async_sessionmaker):
+        # Other instances add, delete and re-role groups without telling this one, so the registry is reloaded from
+        # the database instead of relying on the local add_group / remove_group / set_role calls alone.
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                async with session_pool() as session:
+                    await self.load(session)
+
+            except Exception:
+                logger.exception("Group registry reload failed")
+
+    async def resolve(self, session: AsyncSession, telegram_id: str) -> Optional[int]:
+        groups = self.groups.get(telegram_id)
+        if not groups:
+            if self.unknown_chats.get(telegram_id) is not MISSING:
+                return None
+
+            query = select(Group.id, Group.user_id, User.role).join(User, Group.user_id == User.id).where(
+                Group.telegram_id == telegram_id
+            )
+            result = await session.execute(query)
+            rows = result.all()
+            if not rows:
+                self.unknown_chats.set(telegram_id, True)
+                return None
+
+            for group_id, user_id, role in rows:
+                self.add_group(group_id, telegram_id, user_id, role)
+
+            groups = self.groups[telegram_id]
+
+        group_id = min(groups)
+        if self.roles.get(groups[group_id]) == Role.CLIENT:
+            return None
+
+        return group_id
+
+    def add_group(self, group_id: int, telegram_id: str, user_id: int, role: Role):
+        self.groups.setdefault(telegram_id, {})[group_id] = user_id
+        self.roles[user_id] = role
+        self.unknown_chats.pop(telegram_id)
+
+    def remove_group(self, group_id: int, telegram_id: str):
+        groups = self.groups.get(telegram_id, {})
+        groups.pop(group_id, None)
+        if not groups:
+            self.groups.pop(telegram_id, None)
+
+    def set_role(self, user_id: int, role: Role):
+        if user_id in self.roles:
+            self.roles[user_id] = role
+
+
+group_registry = GroupRegistry(
+    unknown_chats_size=config.GROUP_REGISTRY_UNKNOWN_CHATS_SIZE,
+    unknown_chats_ttl=config.GROUP_REGISTRY_UNKNOWN_CHATS_TTL,
+    reload_interval=config.GROUP_REGISTRY_RELOAD_INTERVAL
+)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config_reader import config
+from database.engine import session_maker
+from database.group_registry import group_registry
+from database.orm_queries import add_member_counts, get_latest_member_counts
+
+logger = logging.getLogger(__name__)
+
+
+class MemberCountCache:
+    def __init__(self, session_pool: async_sessionmaker, refresh_interval: float, rate: float, batch_size: int):
+        self.session_pool = session_pool
+        self.refresh_interval = refresh_interval
+        self.delay = 1 / rate
+        self.batch_size = batch_size
+        self.counts: Dict[str, Tuple[int, datetime]] = {}
+        self.pending: Dict[str, None] = {}
+        self.rows = []
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.sweeps = 0
+
+    async def load(self):
+        async with self.session_pool() as session:
+            self.counts = await get_latest_member_counts(session)
+
+    def get(self, telegram_id: str) -> Optional[Tuple[int, datetime]]:
+        found = self.counts.get(telegram_id)
+        if found is None:
+            self.request(telegram_id)
+
+        return found
+
+    def request(self, telegram_id: str):
+        self.pending[telegram_id] = None
+        self.wakeup.set()
+
+    def start(self, bot: Bot):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(bot))
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+
+            self.task = None
+
+        await self.flush()
+
+    async def run(self, bot: Bot):
+        next_sweep_at = time.monotonic()
+        while True:
+            if time.monotonic() >= next_sweep_at:
+                for telegram_id in list(group_registry.groups):
+                    self.pending.setdefault(telegram_id)
+
+                self.sweeps += 1
+                next_sweep_at = time.monotonic() + self.refresh_interval
+
+            if not self.pending:
+                await self.flush()
+                self.wakeup.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.wakeup.wait(), max(next_sweep_at - time.monotonic(), 0))
+
+                continue
+
+            telegram_id = next(iter(self.pending))
+            del self.pending[telegram_id]
+            await self.refresh(bot, telegram_id)
+
+            if len(self.rows) >= self.batch_size:
+                await self.flush()
+
+            await asyncio.sleep(self.delay)
+
+    async def refresh(self, bot: Bot, telegram_id: str):
+        try:
+            members_count = await bot.get_chat_member_count(chat_id=telegram_id)
+
+        except TelegramAPIError as ex:
+            self.failures += 1
+            logger.debug("Failed to refresh the member count of %s: %s", telegram_id, ex)
+            return
+
+        now = datetime.now()
+        self.refreshes += 1
+        self.counts[telegram_id] = (members_count, now)
+        self.rows.append({"telegram_id": telegram_id, "members_count": members_count, "created_at": now,
+                          "updated_at": now})
+
+    async def flush(self):
+        if not self.rows:
+            return
+
+        rows, self.rows = self.rows, []
+        try:
+            async with self.session_pool() as session:
+                await add_member_counts(session, rows)
+
+        except Exception:
+            logger.exception("Failed to store %s member counts", len(rows))
+
+    def stats(self) -> dict:
+        return {
+            "groups": len(self.counts),
+            "pending": len(self.pending),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "sweeps": self.sweeps
+        }
+
+
+member_counts = MemberCountCache(
+    session_maker,
+    refresh_interval=config.MEMBER_COUNT_REFRESH_INTERVAL,
+    rate=config.MEMBER_COUNT_REFRESH_RATE,
+    batch_size=config.MEMBER_COUNT_BATCH_SIZE
+)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import suppress
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config_reader import config
+from database.engine import session_maker
+from database.orm_queries import add_messages
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBuffer:
+    def __init__(self, session_pool: async_sessionmaker, flush_size: int, flush_interval_ms: int, max_rows: int,
+                 max_retries: int):
+        self.session_pool = session_pool
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_retries = max_retries
+        self.rows = deque(maxlen=max_rows)
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.stopping = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.retries = 0
+
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+        self.skipped_rows = 0
+        self.last_flush_rows = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    def add(self, group_id: int):
+        if len(self.rows) == self.rows.maxlen:
+            self.dropped_rows += 1
+
+        now = datetime.now()
+        self.rows.append({"group_id": group_id, "created_at": now, "updated_at": now})
+
+        if len(self.rows) >= self.flush_size:
+            self.wakeup.set()
+
+    def start(self):
+        if self.task is None:
+            self.stopping.clear()
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.stopping.set()
+            self.wakeup.set()
+            await self.task
+            self.task = None
+
+        await self.flush()
+
+    async def run(self):
+        while not self.stopping.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+
+            self.wakeup.clear()
+            await self.flush()
+
+    def requeue(self, batch: list):
+        self.retries += 1
+        if self.retries > self.max_retries:
+            self.retries = 0
+            self.dropped_rows += len(batch)
+            logger.error("Dropped %s buffered messages after %s failed flushes", len(batch), self.max_retries)
+            return
+
+        room = self.rows.maxlen - len(self.rows)
+        if room < len(batch):
+            self.dropped_rows += len(batch) - room
+            batch = batch[:room]
+
+        self.rows.extendleft(reversed(batch))
+
+    async def flush(self):
+        async with self.lock:
+            while self.rows:
+                batch = [self.rows.popleft() for _ in range(min(self.flush_size, len(self.rows)))]
+                started = time.perf_counter()
+                try:
+                    self.skipped_rows += await self.write(batch)
+
+                except Exception:
+                    self.failed_flushes += 1
+                    logger.exception("Failed to flush %s buffered messages", len(batch))
+                    self.requeue(batch)
+                    return
+
+                self.retries = 0
+
+                latency = time.perf_counter() - started
+                self.flushes += 1
+                self.flushed_rows += len(batch)
+                self.last_flush_rows = len(batch)
+                self.last_flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+                logger.debug("Flushed %s messages in %.1f ms", len(batch), latency * 1000)
+
+    async def write(self, batch: list) -> int:
+        async with self.session_pool() as session:
+            return await add_messages(session, batch)
+
+    def stats(self) -> dict:
+        return {
+            "buffered_rows": len(self.rows),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "dropped_rows": self.dropped_rows,
+            "skipped_rows": self.skipped_rows,
+            "last_flush_rows": self.last_flush_rows,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency
+        }
+
+
+message_buffer = MessageBuffer(
+    session_maker,
+    flush_size=config.MESSAGE_BUFFER_FLUSH_SIZE,
+    flush_interval_ms=config.MESSAGE_BUFFER_FLUSH_INTERVAL_MS,
+    max_rows=config.MESSAGE_BUFFER_MAX_ROWS,
+    max_retries=config.MESSAGE_BUFFER_MAX_RETRIES
+)
@@ -0,0 +1,198 @@
+import logging
+import re
+from typing import NamedTuple, Tuple, List
+
+from sqlalchemy import select, text, insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.engine import engine
+from database.models import Base, SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+    transactional: bool = True
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "Indexes for hot lookup columns", (
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_users_telegram_id ON users (telegram_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_groups_telegram_id ON groups (telegram_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_groups_user_id ON groups (user_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_group_id_created_at ON messages (group_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_group_id_created_at ON posts (group_id, created_at)",
+    ), transactional=False),
+    Migration(2, "Keyset pagination index for users", (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id ON users (created_at, id)",
+    ), transactional=False),
+    Migration(3, "Partition messages by day and keep the last 30 days", (
+        "ALTER TABLE messages RENAME TO messages_legacy",
+        "ALTER TABLE messages_legacy RENAME CONSTRAINT messages_pkey TO messages_legacy_pkey",
+        "ALTER TABLE messages_legacy RENAME CONSTRAINT messages_group_id_fkey TO messages_legacy_group_id_fkey",
+        "ALTER INDEX IF EXISTS ix_messages_group_id_created_at RENAME TO ix_messages_legacy_group_id_created_at",
+        "ALTER SEQUENCE messages_id_seq RENAME TO messages_legacy_id_seq",
+        "CREATE TABLE messages ("
+        "id SERIAL NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "group_id INTEGER NOT NULL REFERENCES groups (id) ON DELETE CASCADE, "
+        "updated_at TIMESTAMP WITHOUT TIME ZONE, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)",
+        "CREATE INDEX ix_messages_group_id_created_at ON messages (group_id, created_at)",
+        "CREATE TABLE messages_default PARTITION OF messages DEFAULT",
+        "DO $$ DECLARE day date; BEGIN "
+        "FOR day IN SELECT generate_series(current_date - 30, current_date + 7, interval '1 day')::date LOOP "
+        "EXECUTE format('CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)', "
+        "'messages_p' || to_char(day, 'YYYYMMDD'), day, day + 1); "
+        "END LOOP; END $$",
+        "INSERT INTO messages (id, created_at, group_id, updated_at) "
+        "SELECT id, created_at, group_id, updated_at FROM messages_legacy WHERE created_at >= current_date - 30",
+        "SELECT setval('messages_id_seq', COALESCE((SELECT max(id) FROM messages_legacy), 0) + 1, false)",
+        "INSERT INTO message_activity (group_id, bucket, messages_count, created_at, updated_at) "
+        "SELECT group_id, date_trunc('hour', created_at), count(id), LOCALTIMESTAMP, LOCALTIMESTAMP "
+        "FROM messages_legacy GROUP BY group_id, date_trunc('hour', created_at) "
+        "ON CONFLICT (group_id, bucket) DO UPDATE SET messages_count = EXCLUDED.messages_count, "
+        "updated_at = EXCLUDED.updated_at",
+        "DROP TABLE messages_legacy",
+    )),
+    Migration(4, "Broadcast leases", (
+        "ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(64)",
+        "ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITHOUT TIME ZONE",
+    )),
+    Migration(5, "Populate the earnings summary from posts", (
+        "LOCK TABLE posts IN SHARE MODE",
+        "DELETE FROM user_daily_earnings",
+        "DELETE FROM user_earnings",
+        "DELETE FROM group_daily_earnings",
+        "DELETE FROM group_earnings",
+        "INSERT INTO group_earnings (group_id, user_id, total, posts_count, created_at, updated_at) "
+        "SELECT posts.group_id, groups.user_id, sum(posts.total_price), count(posts.id), LOCALTIMESTAMP, "
+        "LOCALTIMESTAMP FROM posts JOIN groups ON groups.id = posts.group_id GROUP BY posts.group_id, groups.user_id",
+        "INSERT INTO group_daily_earnings (group_id, day, amount, created_at, updated_at) "
+        "SELECT group_id, CAST(created_at AS DATE), sum(total_price), LOCALTIMESTAMP, LOCALTIMESTAMP "
+        "FROM posts GROUP BY group_id, CAST(created_at AS DATE)",
+        "INSERT INTO user_earnings (user_id, total, created_at, updated_at) "
+        "SELECT user_id, sum(total), LOCALTIMESTAMP, LOCALTIMESTAMP FROM group_earnings GROUP BY user_id",
+        "INSERT INTO user_daily_earnings (user_id, day, amount, created_at, updated_at) "
+        "SELECT groups.user_id, group_daily_earnings.day, sum(group_daily_earnings.amount), LOCALTIMESTAMP, "
+        "LOCALTIMESTAMP FROM group_daily_earnings JOIN groups ON groups.id = group_daily_earnings.group_id "
+        "GROUP BY groups.user_id, group_daily_earnings.day",
+    )),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+CONCURRENT_INDEX_PATTERN = re.compile(r"INDEX CONCURRENTLY IF NOT EXISTS (\w+)", re.IGNORECASE)
+
+
+async def create_migrations_table(connection: AsyncConnection):
+    await connection.run_sync(SchemaMigration.metadata.create_all, tables=[SchemaMigration.__table__])
+
+
+async def get_applied_versions(connection: AsyncConnection) -> List[int]:
+    result = await connection.execute(select(SchemaMigration.version).order_by(SchemaMigration.version))
+    return list(result.scalars().all())
+
+
+async def drop_invalid_index(connection: AsyncConnection, statement: str):
+    match = CONCURRENT_INDEX_PATTERN.search(statement)
+    if not match:
+        return
+
+    index_name = match.group(1)
+    result = await connection.execute(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :index_name AND NOT pg_index.indisvalid"
+    ), {"index_name": index_name})
+
+    if result.first():
+        logger.warning("Dropping invalid index %s left by an interrupted build", index_name)
+        await connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+
+
+async def apply_migration(migration: Migration):
+    record = insert(SchemaMigration).values(version=migration.version, description=migration.description)
+
+    if migration.transactional:
+        async with engine.begin() as connection:
+            for statement in migration.statements:
+                await connection.execute(text(statement))
+
+            await connection.execute(record)
+
+        return
+
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in migration.statements:
+            await drop_invalid_index(connection, statement)
+            await connection.execute(text(statement))
+
+        await connection.execute(record)
+
+
+async def migrate(target_version: int = LATEST_VERSION) -> List[Migration]:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        applied_versions = set(await get_applied_versions(connection))
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied_versions or migration.version > target_version:
+            continue
+
+        logger.info("Applying migration %s: %s", migration.version, migration.description)
+        await apply_migration(migration)
+        applied.append(migration)
+
+    return applied
+
+
+async def get_schema_version() -> int:
+    async with engine.begin() as connection:
+        await create_migrations_table(connection)
+        applied_versions = await get_applied_versions(connection)
+
+    return applied_versions[-1] if applied_versions else 0
+
+
+async def stamp(connection: AsyncConnection, target_version: int = LATEST_VERSION):
+    applied_versions = set(await get_applied_versions(connection))
+    records = [{"version": migration.version, "description": migration.description} for migration in MIGRATIONS
+               if migration.version <= target_version and migration.version not in applied_versions]
+    if records:
+        await connection.execute(insert(SchemaMigration), records)
+
+
+async def get_missing_tables(connection: AsyncConnection) -> List[str]:
+    result = await connection.execute(text("SELECT tablename FROM pg_tables WHERE schemaname = current_schema()"))
+    existing_tables = set(result.scalars().all())
+    return [table for table in Base.metadata.tables if table not in existing_tables]
+
+
+async def ensure_schema() -> str:
+    async with engine.begin() as connection:
+        missing_tables = await get_missing_tables(connection)
+        if len(missing_tables) == len(Base.metadata.tables):
+            await connection.run_sync(Base.metadata.create_all)
+            await stamp(connection)
+            return "created"
+
+        if SchemaMigration.__tablename__ in missing_tables:
+            await create_migrations_table(connection)
+
+        applied_versions = await get_applied_versions(connection)
+        schema_version = applied_versions[-1] if applied_versions else 0
+
+        if missing_tables:
+            await connection.run_sync(Base.metadata.create_all)
+
+    if schema_version < LATEST_VERSION:
+        raise RuntimeError(f"Schema version {schema_version} is behind {LATEST_VERSION}, "
+                           f"run `python manage.py migrate` before starting the bot")
+
+    return "created missing tables" if missing_tables else "up to date"
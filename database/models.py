@@ -1,7 +1,8 @@
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 
-from sqlalchemy import String, DateTime, Enum as SQLAlchemyEnum, Integer, ForeignKey
+from sqlalchemy import String, DateTime, Date, Enum as SQLAlchemyEnum, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -11,6 +12,17 @@ class Role(Enum):
     CLIENT = "client"
 
 
+class BroadcastAudience(Enum):
+    ALL = "all"
+    VENDORS = "vendors"
+
+
+class BroadcastStatus(Enum):
+    RUNNING = "running"
+    FINISHED = "finished"
+    CANCELLED = "cancelled"
+
+
 class Base(DeclarativeBase):
     created_at: Mapped[DateTime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[DateTime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -18,9 +30,12 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    telegram_id: Mapped[str] = mapped_column(nullable=False)
+    telegram_id: Mapped[str] = mapped_column(nullable=False, unique=True, index=True)
     username: Mapped[str] = mapped_column(String(255), nullable=True)
     first_name: Mapped[str] = mapped_column(String(255), nullable=True)
     last_name: Mapped[str] = mapped_column(String(255), nullable=True)
@@ -33,27 +48,125 @@ class Group(Base):
     __tablename__ = "groups"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    telegram_id: Mapped[str] = mapped_column(nullable=False)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    telegram_id: Mapped[str] = mapped_column(nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
     user: Mapped["User"] = relationship("User", back_populates="groups")
     city_id: Mapped[int] = mapped_column(Integer, nullable=False)
     subject_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    messages: Mapped[list["Message"]] = relationship("Message", back_populates="group", cascade="all, delete-orphan")
+    messages: Mapped[list["Message"]] = relationship("Message", back_populates="group", cascade="all, delete-orphan",
+                                                     passive_deletes=True)
     posts: Mapped[list["Post"]] = relationship("Post", back_populates="group", cascade="all, delete-orphan")
+    activity: Mapped[list["MessageActivity"]] = relationship("MessageActivity", back_populates="group",
+                                                             cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_group_id_created_at", "group_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"}
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.now)
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     group: Mapped["Group"] = relationship("Group", back_populates="messages")
 
 
+class MessageActivity(Base):
+    __tablename__ = "message_activity"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    messages_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    group: Mapped["Group"] = relationship("Group", back_populates="activity")
+
+
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_group_id_created_at", "group_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), nullable=False)
     group: Mapped["Group"] = relationship("Group", back_populates="posts")
     total_price: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class GroupEarnings(Base):
+    __tablename__ = "group_earnings"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    posts_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class GroupDailyEarnings(Base):
+    __tablename__ = "group_daily_earnings"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UserEarnings(Base):
+    __tablename__ = "user_earnings"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UserDailyEarnings(Base):
+    __tablename__ = "user_daily_earnings"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class GroupMemberCount(Base):
+    __tablename__ = "group_member_counts"
+    __table_args__ = (
+        Index("ix_group_member_counts_telegram_id_created_at", "telegram_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    telegram_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    members_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    audience: Mapped[BroadcastAudience] = mapped_column(SQLAlchemyEnum(BroadcastAudience), nullable=False)
+    status: Mapped[BroadcastStatus] = mapped_column(SQLAlchemyEnum(BroadcastStatus), nullable=False,
+                                                    default=BroadcastStatus.RUNNING, index=True)
+    from_chat_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status_message_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    last_user_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    recipients_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lease_owner: Mapped[str] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    description: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+class FsmState(Base):
+    __tablename__ = "fsm_states"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
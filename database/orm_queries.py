@@ -1,11 +1,17 @@
-from datetime import datetime, timedelta
-from typing import List
+from collections import Counter
+from datetime import datetime, timedelta, date
+from typing import List, Optional, Tuple, Dict
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, literal, DateTime, Date, tuple_, true, update, delete, cast, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from database.models import User, Role, Group, Message, Post
+from database.cache import CachedUser, user_cache, user_telegram_ids, users_count_cache
+from database.group_registry import group_registry
+from database.models import User, Role, Group, Message, Post, MessageActivity, GroupMemberCount, Broadcast, \
+    BroadcastAudience, BroadcastStatus, GroupEarnings, GroupDailyEarnings, UserEarnings, UserDailyEarnings
+from utils.cache import MISSING
 
 
 async def find_user_by_telegram_id(session: AsyncSession, telegram_id: str) -> User:
@@ -22,9 +28,34 @@ async def find_user_by_id(session: AsyncSession, user_id: int) -> User:
     return found_user
 
 
+async def find_cached_user_by_telegram_id(session: AsyncSession, telegram_id: str) -> Optional[CachedUser]:
+    cached_user = user_cache.get(telegram_id)
+    if cached_user is not MISSING:
+        return cached_user
+
+    query = select(
+        User.id, User.telegram_id, User.role, User.allowed_groups_count, func.count(Group.id)
+    ).outerjoin(Group, Group.user_id == User.id).where(User.telegram_id == telegram_id).group_by(User.id)
+    result = await session.execute(query)
+    row = result.first()
+    if not row:
+        return None
+
+    cached_user = CachedUser(*row)
+    user_cache.set(telegram_id, cached_user)
+    user_telegram_ids[cached_user.id] = telegram_id
+    return cached_user
+
+
+def invalidate_cached_user(user_id: int):
+    telegram_id = user_telegram_ids.get(user_id)
+    if telegram_id is not None:
+        user_cache.pop(telegram_id)
+
+
 async def is_vendor(session: AsyncSession, telegram_id: str) -> bool:
-    found_user = await find_user_by_telegram_id(session, telegram_id)
-    return found_user.role == Role.VENDOR or found_user.role == Role.ADMIN
+    found_user = await find_cached_user_by_telegram_id(session, telegram_id)
+    return found_user is not None and (found_user.role == Role.VENDOR or found_user.role == Role.ADMIN)
 
 
 async def add_user(session: AsyncSession, telegram_id: str, first_name: str, last_name: str, username: str,
@@ -33,25 +64,125 @@ async def add_user(session: AsyncSession, telegram_id: str, first_name: str, las
                 allowed_groups_count=allowed_groups_count)
     session.add(user)
     await session.commit()
+    user_cache.pop(telegram_id)
+    users_count_cache.clear()
     return user
 
 
-async def find_all_users(session: AsyncSession) -> List[User]:
-    query = select(User).order_by(User.created_at)
+async def count_users(session: AsyncSession) -> int:
+    users_count = users_count_cache.get("users")
+    if users_count is not MISSING:
+        return users_count
+
+    result = await session.execute(select(func.count(User.id)))
+    users_count = result.scalar()
+    users_count_cache.set("users", users_count)
+    return users_count
+
+
+async def find_users_page(session: AsyncSession, limit: int, after_user_id: int = None,
+                          before_user_id: int = None, last: bool = False) -> List[User]:
+    query = select(User)
+    backward = last or before_user_id is not None
+
+    if after_user_id is not None:
+        cursor = select(User.created_at).where(User.id == after_user_id).scalar_subquery()
+        query = query.where(tuple_(User.created_at, User.id) > tuple_(cursor, after_user_id))
+
+    elif before_user_id is not None:
+        cursor = select(User.created_at).where(User.id == before_user_id).scalar_subquery()
+        query = query.where(tuple_(User.created_at, User.id) < tuple_(cursor, before_user_id))
+
+    if backward:
+        query = query.order_by(User.created_at.desc(), User.id.desc())
+
+    else:
+        query = query.order_by(User.created_at, User.id)
+
+    result = await session.execute(query.limit(limit))
+    found_users = list(result.scalars().all())
+    if backward:
+        found_users.reverse()
+
+    return found_users
+
+
+def get_audience_filter(audience: BroadcastAudience):
+    return User.role == Role.VENDOR if audience == BroadcastAudience.VENDORS else true()
+
+
+async def count_broadcast_recipients(session: AsyncSession, audience: BroadcastAudience) -> int:
+    result = await session.execute(select(func.count(User.id)).where(get_audience_filter(audience)))
+    return result.scalar()
+
+
+async def find_broadcast_recipients(session: AsyncSession, audience: BroadcastAudience, after_user_id: int,
+                                    limit: int) -> List[Tuple[int, str]]:
+    query = select(User.id, User.telegram_id).where(get_audience_filter(audience), User.id > after_user_id).order_by(
+        User.id
+    ).limit(limit)
+
     result = await session.execute(query)
-    found_users = result.scalars().all()
-    return list(found_users)
+    return [(user_id, telegram_id) for user_id, telegram_id in result.all()]
+
+
+async def add_broadcast(session: AsyncSession, audience: BroadcastAudience, from_chat_id: str, message_id: int,
+                        recipients_count: int) -> Broadcast:
+    broadcast = Broadcast(
+        audience=audience,
+        from_chat_id=from_chat_id,
+        message_id=message_id,
+        recipients_count=recipients_count
+    )
+    session.add(broadcast)
+    await session.commit()
+    return broadcast
+
+
+async def get_broadcast(session: AsyncSession, broadcast_id: int) -> Optional[Broadcast]:
+    return await session.get(Broadcast, broadcast_id)
+
+
+async def claim_broadcast(session: AsyncSession, broadcast_id: int, owner: str, lease: float) -> bool:
+    now = datetime.now()
+    query = update(Broadcast).where(
+        Broadcast.id == broadcast_id,
+        Broadcast.status == BroadcastStatus.RUNNING,
+        (Broadcast.lease_owner.is_(None)) | (Broadcast.lease_owner == owner) | (Broadcast.lease_expires_at < now)
+    ).values(lease_owner=owner, lease_expires_at=now + timedelta(seconds=lease)).returning(Broadcast.id)
+
+    result = await session.execute(query)
+    claimed = result.first() is not None
+    await session.commit()
+    return claimed
+
+
+async def release_broadcasts(session: AsyncSession, owner: str):
+    await session.execute(update(Broadcast).where(Broadcast.lease_owner == owner).values(
+        lease_owner=None,
+        lease_expires_at=None
+    ))
+    await session.commit()
+
+
+async def find_running_broadcasts(session: AsyncSession) -> List[Broadcast]:
+    query = select(Broadcast).where(Broadcast.status == BroadcastStatus.RUNNING).order_by(Broadcast.id)
+    result = await session.execute(query)
+    return list(result.scalars().all())
 
 
 async def set_user_allowed_groups_count(session: AsyncSession, user: User, allowed_groups_count: int) -> User:
     user.allowed_groups_count = allowed_groups_count
     await session.commit()
+    user_cache.pop(user.telegram_id)
     return user
 
 
 async def set_user_role(session: AsyncSession, user: User, role: Role) -> User:
     user.role = role
     await session.commit()
+    user_cache.pop(user.telegram_id)
+    group_registry.set_role(user.id, role)
     return user
 
 
@@ -65,6 +196,10 @@ async def add_group(session: AsyncSession, user_id: int, telegram_id: str, city_
 
     session.add(group)
     await session.commit()
+    invalidate_cached_user(user_id)
+
+    role = await session.scalar(select(User.role).where(User.id == user_id))
+    group_registry.add_group(group.id, telegram_id, user_id, role)
     return group
 
 
@@ -77,8 +212,10 @@ async def get_user_groups(session: AsyncSession, user_id: int) -> List[Group]:
 
 async def get_group_by_telegram_id_and_user_telegram_id(session: AsyncSession, group_telegram_id: str,
                                                         user_telegram_id: str) -> Group:
-    user = await find_user_by_telegram_id(session, user_telegram_id)
-    query = select(Group).where(Group.telegram_id == group_telegram_id, Group.user_id == user.id)
+    query = select(Group).join(User, Group.user_id == User.id).where(
+        Group.telegram_id == group_telegram_id,
+        User.telegram_id == user_telegram_id
+    )
     result = await session.execute(query)
     found_group = result.scalars().first()
     return found_group
@@ -98,61 +235,231 @@ async def get_group_by_telegram_id(session: AsyncSession, group_telegram_id: str
     return found_group
 
 
+async def subtract_group_earnings(session: AsyncSession, group: Group):
+    await session.execute(select(Group.id).where(Group.id == group.id).with_for_update())
+    result = await session.execute(
+        select(GroupEarnings.total).where(GroupEarnings.group_id == group.id).with_for_update()
+    )
+    group_total = result.scalar() or 0
+    await session.execute(
+        select(GroupDailyEarnings.day).where(GroupDailyEarnings.group_id == group.id).with_for_update()
+    )
+
+    await session.execute(update(UserEarnings).where(UserEarnings.user_id == group.user_id).values(
+        total=UserEarnings.total - group_total
+    ))
+    await session.execute(update(UserDailyEarnings).where(
+        UserDailyEarnings.user_id == group.user_id,
+        GroupDailyEarnings.group_id == group.id,
+        GroupDailyEarnings.day == UserDailyEarnings.day
+    ).values(amount=UserDailyEarnings.amount - GroupDailyEarnings.amount))
+
+
 async def delete_group(session: AsyncSession, group: Group):
+    await subtract_group_earnings(session, group)
     await session.delete(group)
     await session.commit()
+    invalidate_cached_user(group.user_id)
+    group_registry.remove_group(group.id, group.telegram_id)
+
+
+def get_activity_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def add_messages(session: AsyncSession, rows: List[dict]) -> int:
+    query = select(Group.id).where(Group.id.in_({row["group_id"] for row in rows})).with_for_update(key_share=True)
+    result = await session.execute(query)
+    existing_group_ids = set(result.scalars().all())
+
+    skipped_rows_count = len(rows)
+    rows = [row for row in rows if row["group_id"] in existing_group_ids]
+    skipped_rows_count -= len(rows)
+    if not rows:
+        await session.commit()
+        return skipped_rows_count
 
+    await session.execute(insert(Message), rows)
 
-async def add_message(session: AsyncSession, group_id: int):
-    message = Message(
-        group_id=group_id
+    buckets = Counter((row["group_id"], get_activity_bucket(row["created_at"])) for row in rows)
+    now = datetime.now()
+    query = pg_insert(MessageActivity).values([
+        {"group_id": group_id, "bucket": bucket, "messages_count": count, "created_at": now, "updated_at": now}
+        for (group_id, bucket), count in buckets.items()
+    ])
+    query = query.on_conflict_do_update(
+        index_elements=[MessageActivity.group_id, MessageActivity.bucket],
+        set_={
+            "messages_count": MessageActivity.messages_count + query.excluded.messages_count,
+            "updated_at": query.excluded.updated_at
+        }
     )
-    session.add(message)
+    await session.execute(query)
     await session.commit()
+    return skipped_rows_count
 
 
 async def get_messages_count_last_7_days(session: AsyncSession, group_id: int) -> int:
-    now = datetime.now()
-    seven_days_ago = now - timedelta(days=7)
+    seven_days_ago = get_activity_bucket(datetime.now() - timedelta(days=7))
 
-    query = select(func.count(Message.id)).where(
-        Message.group_id == group_id,
-        Message.created_at >= seven_days_ago
+    query = select(func.sum(MessageActivity.messages_count)).where(
+        MessageActivity.group_id == group_id,
+        MessageActivity.bucket >= seven_days_ago
     )
 
     result = await session.execute(query)
-    messages_count = result.scalar()
+    messages_count = result.scalar() or 0
     return messages_count
 
 
+async def add_member_counts(session: AsyncSession, rows: List[dict]):
+    await session.execute(insert(GroupMemberCount), rows)
+    await session.commit()
+
+
+async def get_latest_member_counts(session: AsyncSession) -> Dict[str, Tuple[int, datetime]]:
+    group_telegram_ids = select(Group.telegram_id).distinct().subquery()
+    latest = select(
+        GroupMemberCount.members_count,
+        GroupMemberCount.created_at
+    ).where(
+        GroupMemberCount.telegram_id == group_telegram_ids.c.telegram_id
+    ).order_by(GroupMemberCount.created_at.desc()).limit(1).lateral()
+    query = select(group_telegram_ids.c.telegram_id, latest.c.members_count, latest.c.created_at).join(latest, true())
+
+    result = await session.execute(query)
+    return {telegram_id: (members_count, created_at) for telegram_id, members_count, created_at in result.all()}
+
+
+async def backfill_message_activity(session: AsyncSession) -> int:
+    now = datetime.now()
+    bucket = func.date_trunc("hour", Message.created_at)
+    source = select(
+        Message.group_id,
+        bucket,
+        func.count(Message.id),
+        literal(now, DateTime),
+        literal(now, DateTime)
+    ).group_by(Message.group_id, bucket)
+
+    query = pg_insert(MessageActivity).from_select(
+        ["group_id", "bucket", "messages_count", "created_at", "updated_at"], source
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[MessageActivity.group_id, MessageActivity.bucket],
+        set_={
+            "messages_count": query.excluded.messages_count,
+            "updated_at": query.excluded.updated_at
+        }
+    )
+    result = await session.execute(query)
+    await session.commit()
+    return result.rowcount
+
+
+def upsert_increments(model, keys: dict, increments: dict, now: datetime, **values):
+    query = pg_insert(model).values(**keys, **increments, **values, created_at=now, updated_at=now)
+    return query.on_conflict_do_update(
+        index_elements=[getattr(model, key) for key in keys],
+        set_={
+            **{column: getattr(model, column) + getattr(query.excluded, column) for column in increments},
+            "updated_at": query.excluded.updated_at
+        }
+    )
+
+
 async def add_post(session: AsyncSession, group_id: int, total_price: int):
+    now = datetime.now()
     post = Post(
         group_id=group_id,
-        total_price=total_price
+        total_price=total_price,
+        created_at=now,
+        updated_at=now
     )
     session.add(post)
+
+    result = await session.execute(select(Group.user_id).where(Group.id == group_id))
+    user_id = result.scalar()
+
+    await session.execute(upsert_increments(GroupEarnings, {"group_id": group_id},
+                                            {"total": total_price, "posts_count": 1}, now, user_id=user_id))
+    await session.execute(upsert_increments(GroupDailyEarnings, {"group_id": group_id, "day": now.date()},
+                                            {"amount": total_price}, now))
+    await session.execute(upsert_increments(UserEarnings, {"user_id": user_id}, {"total": total_price}, now))
+    await session.execute(upsert_increments(UserDailyEarnings, {"user_id": user_id, "day": now.date()},
+                                            {"amount": total_price}, now))
     await session.commit()
 
 
-async def get_total_price_all_time(session: AsyncSession, group_id: int) -> int:
-    query = select(func.sum(Post.total_price)).where(
-        Post.group_id == group_id
+def get_month_start() -> date:
+    # Daily totals cannot tell the hours of a day apart, so "the last N days" are N calendar days including today.
+    return date.today() - timedelta(days=29)
+
+
+def get_daily_earnings_columns(amount, day) -> tuple:
+    week_start = date.today() - timedelta(days=6)
+    return (
+        func.coalesce(func.sum(amount), 0),
+        func.coalesce(func.sum(amount).filter(day >= week_start), 0)
     )
 
-    result = await session.execute(query)
-    total_price = result.scalar() or 0
-    return total_price
 
+async def get_group_earnings(session: AsyncSession, group_id: int) -> Tuple[int, int, int]:
+    total = select(GroupEarnings.total).where(GroupEarnings.group_id == group_id).scalar_subquery()
+    query = select(
+        func.coalesce(total, 0),
+        *get_daily_earnings_columns(GroupDailyEarnings.amount, GroupDailyEarnings.day)
+    ).where(GroupDailyEarnings.group_id == group_id, GroupDailyEarnings.day >= get_month_start())
 
-async def get_total_price_last_days(session: AsyncSession, group_id: int, days: int) -> int:
-    now = datetime.now()
-    thirty_days_ago = now - timedelta(days=days)
+    result = await session.execute(query)
+    return tuple(result.one())
 
-    query = select(func.sum(Post.total_price)).where(
-        Post.group_id == group_id,
-        Post.created_at >= thirty_days_ago
-    )
+
+async def get_user_earnings(session: AsyncSession, user_id: int) -> Tuple[int, int, int]:
+    total = select(UserEarnings.total).where(UserEarnings.user_id == user_id).scalar_subquery()
+    query = select(
+        func.coalesce(total, 0),
+        *get_daily_earnings_columns(UserDailyEarnings.amount, UserDailyEarnings.day)
+    ).where(UserDailyEarnings.user_id == user_id, UserDailyEarnings.day >= get_month_start())
 
     result = await session.execute(query)
-    total_price = result.scalar() or 0
-    return total_price
+    return tuple(result.one())
+
+
+async def rebuild_earnings(session: AsyncSession) -> int:
+    await session.execute(text("LOCK TABLE posts IN SHARE MODE"))
+    result = await session.execute(select(GroupEarnings.group_id, GroupEarnings.total))
+    totals_before = dict(result.all())
+
+    for model in (UserDailyEarnings, UserEarnings, GroupDailyEarnings, GroupEarnings):
+        await session.execute(delete(model))
+
+    now = literal(datetime.now(), DateTime)
+    day = cast(Post.created_at, Date)
+    await session.execute(insert(GroupEarnings).from_select(
+        ["group_id", "user_id", "total", "posts_count", "created_at", "updated_at"],
+        select(Post.group_id, Group.user_id, func.sum(Post.total_price), func.count(Post.id), now, now).join(
+            Group, Post.group_id == Group.id
+        ).group_by(Post.group_id, Group.user_id)
+    ))
+    await session.execute(insert(GroupDailyEarnings).from_select(
+        ["group_id", "day", "amount", "created_at", "updated_at"],
+        select(Post.group_id, day, func.sum(Post.total_price), now, now).group_by(Post.group_id, day)
+    ))
+    await session.execute(insert(UserEarnings).from_select(
+        ["user_id", "total", "created_at", "updated_at"],
+        select(GroupEarnings.user_id, func.sum(GroupEarnings.total), now, now).group_by(GroupEarnings.user_id)
+    ))
+    await session.execute(insert(UserDailyEarnings).from_select(
+        ["user_id", "day", "amount", "created_at", "updated_at"],
+        select(Group.user_id, GroupDailyEarnings.day, func.sum(GroupDailyEarnings.amount), now, now).join(
+            Group, GroupDailyEarnings.group_id == Group.id
+        ).group_by(Group.user_id, GroupDailyEarnings.day)
+    ))
+
+    result = await session.execute(select(GroupEarnings.group_id, GroupEarnings.total))
+    totals_after = dict(result.all())
+    await session.commit()
+
+    return sum(1 for group_id in totals_before.keys() | totals_after.keys()
+               if totals_before.get(group_id) != totals_after.get(group_id))
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import re
+from contextlib import suppress
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config_reader import config
+from database.engine import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "messages"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+DROP_LOCK_TIMEOUT = "2s"
+LOCK_NOT_AVAILABLE = "55P03"
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_p(\d{{8}})$")
+
+
+def get_partition_name(day: date) -> str:
+    return f"{PARENT_TABLE}_p{day:%Y%m%d}"
+
+
+async def is_partitioned(connection: AsyncConnection) -> bool:
+    result = await connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+        "WHERE pg_class.relname = :table_name"
+    ), {"table_name": PARENT_TABLE})
+    return result.first() is not None
+
+
+async def get_partitions(connection: AsyncConnection) -> Dict[str, date]:
+    result = await connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table_name"
+    ), {"table_name": PARENT_TABLE})
+
+    partitions = {}
+    for name in result.scalars().all():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[name] = date(int(match.group(1)[:4]), int(match.group(1)[4:6]), int(match.group(1)[6:]))
+
+    return partitions
+
+
+async def create_partitions(connection: AsyncConnection, existing: Dict[str, date], ahead_days: int) -> List[str]:
+    await connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} "
+                                  f"DEFAULT"))
+
+    created = []
+    today = date.today()
+    for offset in range(ahead_days + 1):
+        day = today + timedelta(days=offset)
+        name = get_partition_name(day)
+        if name in existing:
+            continue
+
+        # Postgres refuses to add a partition while the default one holds rows of its range, so those rows are
+        # moved into a detached table first and the table is attached once the default partition is clear.
+        bounds = {"start": day, "end": day + timedelta(days=1)}
+        await connection.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        await connection.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        await connection.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        ))
+        created.append(name)
+
+    return created
+
+
+async def prune_default_partition(connection: AsyncConnection, retention_days: int) -> int:
+    result = await connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :oldest_day"),
+                                      {"oldest_day": date.today() - timedelta(days=retention_days)})
+    if result.rowcount:
+        logger.info("Deleted %s expired rows from %s", result.rowcount, DEFAULT_PARTITION)
+
+    return result.rowcount
+
+
+async def drop_partition(name: str) -> bool:
+    # Detaching takes an ACCESS EXCLUSIVE lock on the parent table, and DETACH CONCURRENTLY is not allowed while a
+    # default partition exists. Each partition is therefore dropped in its own short transaction that gives up
+    # instead of queueing ahead of the message inserts, and is retried on the next maintenance run.
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text(f"SET LOCAL lock_timeout = '{DROP_LOCK_TIMEOUT}'"))
+            await connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            await connection.execute(text(f"DROP TABLE {name}"))
+
+    except DBAPIError as ex:
+        if getattr(ex.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+            raise
+
+        logger.warning("Partition %s is busy, dropping it on the next maintenance run", name)
+        return False
+
+    return True
+
+
+async def drop_partitions(existing: Dict[str, date], retention_days: int) -> List[str]:
+    oldest_day = date.today() - timedelta(days=retention_days)
+    dropped = []
+    for name, day in sorted(existing.items(), key=lambda item: item[1]):
+        if day >= oldest_day:
+            continue
+
+        if await drop_partition(name):
+            dropped.append(name)
+
+    return dropped
+
+
+async def maintain_partitions(ahead_days: int = config.MESSAGE_PARTITIONS_AHEAD_DAYS,
+                              retention_days: Optional[int] = config.MESSAGE_RETENTION_DAYS) -> Tuple[List[str],
+                                                                                                     List[str]]:
+    async with engine.begin() as connection:
+        if not await is_partitioned(connection):
+            logger.warning("Table %s is not partitioned yet, run `python manage.py migrate`", PARENT_TABLE)
+            return [], []
+
+        existing = await get_partitions(connection)
+        created = await create_partitions(connection, existing, ahead_days)
+        if retention_days is not None:
+            await prune_default_partition(connection, retention_days)
+
+    dropped = await drop_partitions(existing, retention_days) if retention_days is not None else []
+
+    if created or dropped:
+        logger.info("Message partitions created: %s, dropped: %s", created, dropped)
+
+    return created, dropped
+
+
+class PartitionMaintainer:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None and self.interval > 0:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+
+            self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await maintain_partitions()
+
+            except Exception:
+                logger.exception("Message partition maintenance failed")
+
+
+partition_maintainer = PartitionMaintainer(interval=config.MESSAGE_PARTITION_MAINTENANCE_INTERVAL)
@@ -4,25 +4,28 @@ from contextlib import suppress
 from aiogram import F, Router
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.filters import Command
+from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.catalog import catalog
 from api.client import ApiClient
 from api.enums import Endpoint
 from api.exceptions import NoSuchEntityException
 from api.views import UserView, SubjectView, CityView
 from config_reader import config
-from database.models import Role, User
-from database.orm_queries import find_user_by_telegram_id, add_user, find_all_users, find_user_by_id, \
-    set_user_allowed_groups_count, set_user_role
+from database.broadcaster import broadcaster, get_broadcast_status_text
+from database.models import Role, User, BroadcastAudience, BroadcastStatus
+from database.orm_queries import find_cached_user_by_telegram_id, add_user, count_users, find_users_page, \
+    find_user_by_id, set_user_allowed_groups_count, set_user_role, count_broadcast_recipients, add_broadcast, \
+    get_broadcast
 from keyboards.admin import main_kb, administration_kb, all_users_kb, PaginationCbData, UserInfoCbData, \
     user_settings_kb, UserAllowedChatsChangeCbData, UserRoleChangeCbData, all_subjects_kb, SubjectCbData, subject_kb, \
     SubjectNameChangeCbData, cancel_kb, CitiesCbData, all_cities_kb, SubjectDeleteCbData, CityCbData, city_kb, \
     CityNameChangeCbData, subjects_and_cities_kb, SubjectsCbData, CityDeleteCbData, create_city_kb, CitySubjectCdData, \
-    back_kb
+    back_kb, broadcast_audience_kb, broadcast_submit_kb, BroadcastCancelCbData, broadcast_status_kb
 
 from filters.chat_type import ChatTypeFilter, IsAdminFilter
 
@@ -32,15 +35,103 @@ router.message.filter(ChatTypeFilter(is_group=False), IsAdminFilter())
 
 @router.message(Command("start"))
 async def command_start_handler(message: Message, session: AsyncSession):
-    if not await find_user_by_telegram_id(session, str(message.chat.id)):
+    if not await find_cached_user_by_telegram_id(session, str(message.chat.id)):
         user = await add_user(session, str(message.chat.id), message.from_user.first_name, message.from_user.last_name,
                               message.from_user.username, role=Role.ADMIN, allowed_groups_count=100)
         api = ApiClient(user)
-        api.create(Endpoint.USER, UserView(str(message.chat.id)).to_dict())
+        await api.create(Endpoint.USER, UserView(str(message.chat.id)).to_dict())
 
     await message.answer("👋 Здравствуйте, админ!", reply_markup=main_kb())
 
 
+class NewBroadcast(StatesGroup):
+    choosing_audience = State()
+    setting_message = State()
+    submitting = State()
+
+
+@router.message(StateFilter(None), F.text.lower().contains("рассылка"))
+async def broadcast_handler(message: Message, state: FSMContext):
+    await message.answer("Кому отправить рассылку?", reply_markup=broadcast_audience_kb())
+    await state.set_state(NewBroadcast.choosing_audience)
+
+
+@router.message(NewBroadcast.choosing_audience, F.text.lower().contains("отменить"))
+@router.message(NewBroadcast.setting_message, F.text.lower().contains("отменить"))
+@router.message(NewBroadcast.submitting, F.text.lower().contains("отменить"))
+async def broadcast_cancel_handler(message: Message, state: FSMContext):
+    await message.answer("Действие отменено", reply_markup=administration_kb())
+    await state.clear()
+
+
+@router.message(NewBroadcast.choosing_audience, F.text.lower().in_({"всем", "продавцам"}))
+async def broadcast_audience_handler(message: Message, state: FSMContext):
+    audience = BroadcastAudience.VENDORS if message.text.lower() == "продавцам" else BroadcastAudience.ALL
+    await state.update_data(audience=audience.value)
+    await message.answer("Отправьте мне сообщение для рассылки", reply_markup=cancel_kb())
+    await state.set_state(NewBroadcast.setting_message)
+
+
+@router.message(NewBroadcast.choosing_audience)
+async def broadcast_audience_unknown_handler(message: Message):
+    await message.answer("Выберите получателей на клавиатуре")
+
+
+@router.message(NewBroadcast.setting_message)
+async def broadcast_message_handler(message: Message, session: AsyncSession, state: FSMContext):
+    data = await state.get_data()
+    recipients_count = await count_broadcast_recipients(session, BroadcastAudience(data["audience"]))
+    await state.update_data(message_id=message.message_id, recipients_count=recipients_count)
+
+    await message.copy_to(message.chat.id)
+    await message.answer(f"Получателей: {recipients_count}. Отправить это сообщение?",
+                         reply_markup=broadcast_submit_kb())
+    await state.set_state(NewBroadcast.submitting)
+
+
+@router.message(NewBroadcast.submitting, F.text.lower().contains("подтвердить"))
+async def broadcast_submit_handler(message: Message, session: AsyncSession, state: FSMContext):
+    data = await state.get_data()
+    broadcast = await add_broadcast(session, BroadcastAudience(data["audience"]), str(message.chat.id),
+                                    data["message_id"], data["recipients_count"])
+    await state.clear()
+
+    await message.answer("Рассылка запущена", reply_markup=administration_kb())
+    status_message = await message.answer(get_broadcast_status_text(broadcast),
+                                          reply_markup=broadcast_status_kb(broadcast.id))
+    broadcast.status_message_id = status_message.message_id
+    await session.commit()
+
+    broadcaster.start(message.bot, broadcast.id)
+
+
+@router.message(NewBroadcast.submitting)
+async def broadcast_submit_unknown_handler(message: Message):
+    await message.answer("Подтвердите или отмените рассылку")
+
+
+@router.callback_query(BroadcastCancelCbData.filter())
+async def broadcast_stop_handler(callback: CallbackQuery, callback_data: BroadcastCancelCbData,
+                                 session: AsyncSession):
+    if callback.from_user.id not in config.ADMIN_TELEGRAM_IDS:
+        return await callback.answer()
+
+    broadcast = await get_broadcast(session, callback_data.broadcast_id)
+    if not broadcast:
+        return await callback.answer("Рассылка не найдена")
+
+    if broadcast.status == BroadcastStatus.RUNNING:
+        broadcast.status = BroadcastStatus.CANCELLED
+        await session.commit()
+        await broadcaster.cancel(broadcast.id)
+        await session.refresh(broadcast)
+
+    with suppress(TelegramBadRequest):
+        await callback.message.edit_text(get_broadcast_status_text(broadcast))
+
+    await callback.answer("Рассылка остановлена")
+
+
 @router.message(F.text.lower().contains("админка"))
 @router.message(F.text.lower().contains("вернуться в админку"))
 async def admin_panel_handler(message: Message):
@@ -54,9 +145,10 @@ async def main_menu_handler(message: Message):
 
 @router.message(F.text.lower().contains("пользователи"))
 async def users_handler(message: Message, session: AsyncSession):
-    users = await find_all_users(session)
+    users_count = await count_users(session)
+    users = await find_users_page(session, config.PAGE_LIMIT)
     if users:
-        await message.answer(f"Всего пользователей: {len(users)}", reply_markup=all_users_kb(users))
+        await message.answer(f"Всего пользователей: {users_count}", reply_markup=all_users_kb(users, users_count))
 
     else:
         await message.answer("Пользователей не найдено")
@@ -93,18 +185,35 @@ async def get_user_info_handler(callback: CallbackQuery, callback_data: UserInfo
 async def make_pagination_handler(callback: CallbackQuery, callback_data: PaginationCbData, session: AsyncSession):
     page = callback_data.page
     limit = config.PAGE_LIMIT
-    users = await find_all_users(session)
+    users_count = await count_users(session)
+    max_page = math.ceil(users_count / limit) - 1
 
-    if users:
-        max_page = math.ceil(len(users) / limit) - 1
-        if page > max_page or page < 0:
-            await callback.answer("Такой страницы не существует")
-            page = 0
+    if page > max_page or page < 0:
+        await callback.answer("Такой страницы не существует")
+        page = 0
+        users = []
+
+    elif callback_data.cursor and callback_data.backward:
+        users = await find_users_page(session, limit, before_user_id=callback_data.cursor)
+
+    elif callback_data.cursor:
+        users = await find_users_page(session, limit, after_user_id=callback_data.cursor)
+
+    elif callback_data.backward and page > 0:
+        users = await find_users_page(session, users_count - page * limit, last=True)
 
+    else:
+        users = []
+
+    if not users:
+        page = 0
+        users = await find_users_page(session, limit)
+
+    if users:
         with suppress(TelegramBadRequest):
             await callback.message.edit_text(
-                f"Всего пользователей: {len(users)}",
-                reply_markup=all_users_kb(users, page=page))
+                f"Всего пользователей: {users_count}",
+                reply_markup=all_users_kb(users, users_count, page=page))
 
     else:
         await callback.message.edit_text("Пользователей не найдено")
@@ -168,9 +277,9 @@ async def change_user_role_handler(callback: CallbackQuery, callback_data: UserR
 
 @router.message(F.text.lower().contains("направления и города"))
 async def subjects_handler(message: Message, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
-    response = client.get_all(Endpoint.SUBJECT)
+    response = await client.get_all(Endpoint.SUBJECT)
     subjects = response.get("responseList")
     if subjects:
         await message.answer("Направления и города", reply_markup=subjects_and_cities_kb())
@@ -182,10 +291,10 @@ async def subjects_handler(message: Message, session: AsyncSession):
 
 @router.callback_query(SubjectCbData.filter())
 async def subject_info_handler(callback: CallbackQuery, callback_data: SubjectCbData, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_by_id(Endpoint.SUBJECT, callback_data.subject_id)
+        response = await client.get_by_id(Endpoint.SUBJECT, callback_data.subject_id)
         await callback.message.edit_text(
             text=f"Направление: {response.get('name')}",
             reply_markup=subject_kb(response.get('id'))
@@ -218,13 +327,14 @@ async def set_subject_name_handler(message: Message, session: AsyncSession, stat
     await state.update_data(new_subject_name=message.text)
     data = await state.get_data()
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.update(Endpoint.SUBJECT, SubjectView(
+        await client.update(Endpoint.SUBJECT, SubjectView(
             _id=data["subject_id"],
             name=data["new_subject_name"]
         ).to_dict())
+        catalog.invalidate()
 
         await subjects_handler(message, session)
         await message.answer("Новое название направления установлено", reply_markup=subjects_and_cities_kb())
@@ -241,10 +351,10 @@ async def set_subject_name_unknown_handler(message: Message):
 
 @router.callback_query(CitiesCbData.filter())
 async def subject_cities_handler(callback: CallbackQuery, callback_data: CitiesCbData, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.CITY, {
+        response = await client.get_all(Endpoint.CITY, {
             "subjectId": callback_data.subject_id,
         })
         cities = response.get("responseList")
@@ -259,10 +369,10 @@ async def subject_cities_handler(callback: CallbackQuery, callback_data: CitiesC
 
 @router.callback_query(CityCbData.filter())
 async def subject_city_handler(callback: CallbackQuery, callback_data: CityCbData, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_by_id(Endpoint.CITY, callback_data.city_id)
+        response = await client.get_by_id(Endpoint.CITY, callback_data.city_id)
         await callback.message.edit_text(
             text=callback.message.text + f"\nГород: {response.get('name')}",
             reply_markup=city_kb(response.get('id'), callback_data.subject_id)
@@ -274,10 +384,11 @@ async def subject_city_handler(callback: CallbackQuery, callback_data: CityCbDat
 
 @router.callback_query(SubjectDeleteCbData.filter())
 async def subject_delete_handler(callback: CallbackQuery, callback_data: SubjectDeleteCbData, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.delete(Endpoint.SUBJECT, callback_data.subject_id)
+        await client.delete(Endpoint.SUBJECT, callback_data.subject_id)
+        catalog.invalidate()
         await subjects_handler(callback.message, session)
         await callback.answer("Успешно")
         await callback.message.delete()
@@ -309,13 +420,14 @@ async def set_city_name_handler(message: Message, session: AsyncSession, state:
     await state.update_data(new_city_name=message.text)
     data = await state.get_data()
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.update(Endpoint.CITY, CityView(
+        await client.update(Endpoint.CITY, CityView(
             _id=data["city_id"],
             name=data["new_city_name"]
         ).to_dict())
+        catalog.invalidate()
 
         await subjects_handler(message, session)
         await message.answer("Новое название города установлено")
@@ -332,9 +444,9 @@ async def set_city_name_unknown_handler(message: Message):
 
 @router.callback_query(SubjectsCbData.filter())
 async def all_subjects_cd_handler(callback: CallbackQuery, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
-    response = client.get_all(Endpoint.SUBJECT)
+    response = await client.get_all(Endpoint.SUBJECT)
     subjects = response.get("responseList")
     if subjects:
         await callback.message.answer("Направления и города", reply_markup=subjects_and_cities_kb())
@@ -346,10 +458,11 @@ async def all_subjects_cd_handler(callback: CallbackQuery, session: AsyncSession
 
 @router.callback_query(CityDeleteCbData.filter())
 async def city_delete_handler(callback: CallbackQuery, callback_data: CityDeleteCbData, session: AsyncSession):
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.delete(Endpoint.CITY, callback_data.city_id)
+        await client.delete(Endpoint.CITY, callback_data.city_id)
+        catalog.invalidate()
         await subjects_handler(callback.message, session)
         await callback.answer("Успешно")
         await callback.message.delete()
@@ -380,12 +493,13 @@ async def create_subject_handler(message: Message, session: AsyncSession, state:
     await state.update_data(new_subject_name=message.text)
     data = await state.get_data()
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.create(Endpoint.SUBJECT, SubjectView(
+        await client.create(Endpoint.SUBJECT, SubjectView(
             name=data["new_subject_name"]
         ).to_dict())
+        catalog.invalidate()
 
         await subjects_handler(message, session)
         await message.answer("Новое направление создано")
@@ -408,10 +522,10 @@ class NewCity(StatesGroup):
 @router.message(F.text.lower().contains("добавить город"))
 @router.message(NewCity.setting_city_name, F.text.lower().contains("назад"))
 async def add_city_handler(message: Message, session: AsyncSession, state: FSMContext):
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.SUBJECT)
+        response = await client.get_all(Endpoint.SUBJECT)
         subjects = response.get("responseList")
         if not subjects:
             return message.answer("У вас нету добавленных направлений")
@@ -442,13 +556,14 @@ async def add_city_subject_id_cancel_handler(message: Message, session: AsyncSes
 async def create_city_handler(message: Message, session: AsyncSession, state: FSMContext):
     await state.update_data(new_city_name=message.text)
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.create(Endpoint.CITY, CityView(
+        await client.create(Endpoint.CITY, CityView(
             name=data["new_city_name"],
             subject_id=data["new_city_subject_id"]
         ).to_dict())
+        catalog.invalidate()
 
         await subjects_handler(message, session)
         await message.answer("Новый город создан")
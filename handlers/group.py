@@ -2,8 +2,8 @@ from aiogram import Router
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import Role
-from database.orm_queries import get_group_by_telegram_id, add_message, find_user_by_id
+from database.group_registry import group_registry
+from database.message_buffer import message_buffer
 from filters.chat_type import ChatTypeFilter
 
 router = Router()
@@ -12,8 +12,6 @@ router.message.filter(ChatTypeFilter(is_group=True))
 
 @router.message()
 async def new_message_in_group(message: Message, session: AsyncSession):
-    found_group = await get_group_by_telegram_id(session, str(message.chat.id))
-    if found_group:
-        group_owner = await find_user_by_id(session, found_group.user_id)
-        if group_owner.role != Role.CLIENT:
-            await add_message(session, found_group.id)
+    group_id = await group_registry.resolve(session, str(message.chat.id))
+    if group_id is not None:
+        message_buffer.add(group_id)
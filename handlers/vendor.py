@@ -1,3 +1,4 @@
+import asyncio
 import json
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
@@ -11,13 +12,16 @@ from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.catalog import catalog
 from api.client import ApiClient
 from api.enums import Endpoint, PublicationType, PostStatus
 from api.views import UserView, PriceView, GroupView, PostView, PublicationView, ButtonView
 from config_reader import config
-from database.orm_queries import is_vendor, find_user_by_telegram_id, add_user, add_group, get_user_groups, \
+from database.cache import group_card_cache
+from database.member_counts import member_counts
+from database.orm_queries import is_vendor, find_cached_user_by_telegram_id, add_user, add_group, get_user_groups, \
     get_group_by_telegram_id_and_user_telegram_id, delete_group, get_messages_count_last_7_days, add_post, \
-    get_total_price_last_days, get_total_price_all_time, get_group_by_telegram_id
+    get_group_by_telegram_id, get_user_earnings, get_group_earnings
 from filters.chat_type import ChatTypeFilter
 from handlers.client import default_client_handler
 from keyboards.admin import main_kb as admin_main_kb
@@ -25,6 +29,7 @@ from keyboards.vendor import main_kb, subjects_kb, SubjectCbData, cities_kb, bac
     group_choose_kb, all_groups_kb, GroupCbData, group_kb, GroupWorkTimesCbData, GroupPostsIntervalCbData, \
     GroupPriceListCbData, GroupDeleteCbData, submit_delete_kb, GroupDeleteSubmitCbData, GroupDeleteCancelCbData, \
     calendar_kb, skip_kb, publication_kb, submit_post_kb, statistic_samples_kb, to_main_menu_kb
+from utils.cache import MISSING
 
 router = Router()
 router.message.filter(ChatTypeFilter(is_group=False))
@@ -39,11 +44,11 @@ def main_kb_by_role(message: Message):
 
 @router.message(Command("start"))
 async def command_start_handler(message: Message, session: AsyncSession):
-    if not await find_user_by_telegram_id(session, str(message.chat.id)):
+    if not await find_cached_user_by_telegram_id(session, str(message.chat.id)):
         user = await add_user(session, str(message.chat.id), message.from_user.first_name, message.from_user.last_name,
                               message.from_user.username)
         api = ApiClient(user)
-        api.create(Endpoint.USER, UserView(str(message.chat.id)).to_dict())
+        await api.create(Endpoint.USER, UserView(str(message.chat.id)).to_dict())
 
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
@@ -110,16 +115,15 @@ async def add_group_handler(message: Message, session: AsyncSession, state: FSMC
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
 
-    if len(found_user.groups) >= found_user.allowed_groups_count:
+    if found_user.groups_count >= found_user.allowed_groups_count:
         return await message.answer("Лимит на добавление групп исчерпан, "
                                     "свяжитесь с @parlament_er для увеличения лимита")
 
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.SUBJECT)
-        subjects = response.get("responseList")
+        subjects = await catalog.get_subjects(client)
         if not subjects:
             return await message.answer("Направления не добавлены")
 
@@ -157,11 +161,10 @@ async def add_group_city_handler(callback: CallbackQuery, callback_data: Subject
         return await default_client_handler(callback.message)
 
     await state.update_data(subject_id=callback_data.subject_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.CITY, {"subjectId": callback_data.subject_id})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities(client, callback_data.subject_id)
         if not cities:
             return await callback.answer("Города не добавлены")
 
@@ -192,12 +195,11 @@ async def add_group_group_back_handler(message: Message, session: AsyncSession,
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
         data = await state.get_data()
-        response = client.get_all(Endpoint.CITY, {"subjectId": data["subject_id"]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities(client, data["subject_id"])
         if not cities:
             return await message.answer("Города не добавлены")
 
@@ -221,9 +223,8 @@ async def add_group_price_1_handler(message: Message, session: AsyncSession, sta
                                                            str(message.chat_shared.chat_id), str(message.chat.id)):
         return await message.answer("Вы уже добавили эту группу")
 
-    await state.update_data(group_telegram_id=str(message.chat_shared.chat_id))
-    await state.update_data(group_name=message.chat_shared.title)
-    await state.update_data(group_username=message.chat_shared.username)
+    await state.update_data(group_telegram_id=str(message.chat_shared.chat_id), group_name=message.chat_shared.title,
+                            group_username=message.chat_shared.username)
 
     await message.answer("Отправьте мне стоимость за 1 день в формате:\n<b>цена без закрепа/цена с закрепом</b>\n\n"
                          "Пример:\n<code>10/15</code>",
@@ -354,12 +355,12 @@ async def create_group_handler(message: Message, session: AsyncSession, state: F
         return await message.answer("Ошибка парсинга, попробуйте еще раз")
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
         await add_group(session, found_user.id, data.get("group_telegram_id"),
                         city_id=data["city_id"], subject_id=data["subject_id"])
-        client.create(Endpoint.GROUP, GroupView(
+        await client.create(Endpoint.GROUP, GroupView(
             city_id=data["city_id"],
             name=data.get("group_name"),
             link=data.get("group_link"),
@@ -384,7 +385,7 @@ async def my_groups_handler(message: Message, session: AsyncSession, state: FSMC
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     groups = await get_user_groups(session, found_user.id)
     if not groups:
@@ -394,7 +395,7 @@ async def my_groups_handler(message: Message, session: AsyncSession, state: FSMC
     cities = {}
     for group in groups:
         try:
-            subject = client.get_by_id(Endpoint.SUBJECT, group.subject_id)
+            subject = await catalog.get_subject(client, group.subject_id)
             if subject.get("id") not in subjects_dict:
                 subjects_dict[subject.get("id")] = subject.get("name")
 
@@ -430,12 +431,11 @@ async def my_groups_cities_handler(callback: CallbackQuery, callback_data: Subje
         return await default_client_handler(callback.message)
 
     await state.update_data(subject_id=callback_data.subject_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][callback_data.subject_id]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][callback_data.subject_id])
         if not cities:
             return await callback.answer("Города не добавлены")
 
@@ -456,10 +456,10 @@ async def my_groups_groups_handler(callback: CallbackQuery, callback_data: CityC
         return await default_client_handler(callback.message)
 
     await state.update_data(city_id=callback_data.city_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.GROUP, {
+        response = await client.get_all(Endpoint.GROUP, {
             "cityId": callback_data.city_id,
             "userTelegramId": callback.message.chat.id
         })
@@ -480,11 +480,10 @@ async def my_groups_groups_back_handler(message: Message, session: AsyncSession,
         return await default_client_handler(message)
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][data["subject_id"]]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][data["subject_id"]])
         if not cities:
             return await message.answer("Города не добавлены")
 
@@ -498,15 +497,56 @@ async def my_groups_groups_back_handler(message: Message, session: AsyncSession,
         await message.answer(str(ex))
 
 
-async def get_group_info(message: Message, session: AsyncSession, group_id: int) -> str:
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+def format_age(moment: datetime) -> str:
+    minutes = int((datetime.now() - moment).total_seconds() // 60)
+    if minutes < 1:
+        return "только что"
+
+    if minutes < 60:
+        return f"{minutes} мин. назад"
+
+    if minutes < 24 * 60:
+        return f"{minutes // 60} ч. назад"
+
+    return f"{minutes // (24 * 60)} дн. назад"
+
+
+async def load_group_card(session: AsyncSession, owner_telegram_id: str, group_id: int) -> tuple:
+    found_user = await find_cached_user_by_telegram_id(session, owner_telegram_id)
     client = ApiClient(found_user)
-    group = client.get_by_id(Endpoint.GROUP, group_id)
+    group = await client.get_by_id(Endpoint.GROUP, group_id)
+
+    async def get_location():
+        found_city = await catalog.get_city(client, group.get("cityId"))
+        return found_city, await catalog.get_subject(client, found_city.get("subjectId"))
+
+    async def get_messages_count():
+        group_local = await get_group_by_telegram_id_and_user_telegram_id(session, group.get('groupTelegramId'),
+                                                                          owner_telegram_id)
+        return await get_messages_count_last_7_days(session, group_local.id)
+
+    (city, subject), messages_count_last_7_days = await asyncio.gather(get_location(), get_messages_count())
+    return group, city, subject, messages_count_last_7_days
 
-    city = client.get_by_id(Endpoint.CITY, group.get("cityId"))
-    subject = client.get_by_id(Endpoint.SUBJECT, city.get("subjectId"))
 
-    members_count = await message.bot.get_chat_member_count(chat_id=group.get('groupTelegramId'))
+async def get_group_info(message: Message, session: AsyncSession, group_id: int) -> str:
+    owner_telegram_id = str(message.chat.id)
+    cached_card = group_card_cache.get(group_id)
+    if cached_card is not MISSING and cached_card[0] == owner_telegram_id:
+        group, city, subject, messages_count_last_7_days = cached_card[1]
+
+    else:
+        group, city, subject, messages_count_last_7_days = await load_group_card(session, owner_telegram_id,
+                                                                                 group_id)
+        group_card_cache.set(group_id, (owner_telegram_id, (group, city, subject, messages_count_last_7_days)))
+
+    found_members_count = member_counts.get(group.get('groupTelegramId'))
+    if found_members_count:
+        members_count, updated_at = found_members_count
+        members_count = f"{members_count} (обновлено {format_age(updated_at)})"
+
+    else:
+        members_count = "обновляется"
 
     title = f"<a href='https://t.me/{group.get('link')}'>{group.get('name')}</a>" if group.get('link') else group.get(
         'name')
@@ -524,10 +564,7 @@ async def get_group_info(message: Message, session: AsyncSession, group_id: int)
                            f"{group.get('priceForOneMonth').get('withPin')}")
     average_post_views = group.get('averagePostViews')
 
-    group_local = await get_group_by_telegram_id_and_user_telegram_id(session, telegram_id, str(message.chat.id))
-    messages_count_last_7_days = await get_messages_count_last_7_days(session, group_local.id)
-
-    return (f"Название: {title}\n"
+    card = (f"Название: {title}\n"
             f"Telegram ID: <code>{telegram_id}</code>\n"
             f"Направление: {subject.get('name')}\n"
             f"Город: {city.get('name')}\n\n"
@@ -541,6 +578,7 @@ async def get_group_info(message: Message, session: AsyncSession, group_id: int)
             f"Кол-во участников: {members_count}\n"
             f"Среднее кол-во просмотров одной рекламы: {average_post_views}\n"
             f"Кол-во сообщений за последние 7 дней: {messages_count_last_7_days}")
+    return card
 
 
 @router.callback_query(MyGroups.group, GroupCbData.filter())
@@ -598,15 +636,16 @@ async def set_group_work_times_handler(message: Message, session: AsyncSession,
     except Exception:
         return await message.answer("Ошибка во время парсинга, попробуйте еще раз")
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
     try:
-        client.update(Endpoint.GROUP, {
+        await client.update(Endpoint.GROUP, {
             "id": data["group_id"],
             "workingHoursStart": start_time.time().strftime("%H:%M"),
             "workingHoursEnd": end_time.time().strftime("%H:%M"),
         })
+        group_card_cache.pop(data["group_id"])
         await message.answer(
             text=await get_group_info(message, session, data["group_id"]),
             parse_mode=ParseMode.HTML,
@@ -642,7 +681,7 @@ async def set_group_posts_interval_handler(message: Message, session: AsyncSessi
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
 
@@ -658,10 +697,11 @@ async def set_group_posts_interval_handler(message: Message, session: AsyncSessi
         return await message.answer("Ошибка во время парсинга, попробуйте еще раз")
 
     try:
-        client.update(Endpoint.GROUP, {
+        await client.update(Endpoint.GROUP, {
             "id": data["group_id"],
             "postIntervalInMinutes": interval
         })
+        group_card_cache.pop(data["group_id"])
 
         await message.answer(
             text=await get_group_info(message, session, data["group_id"]),
@@ -805,16 +845,17 @@ async def set_group_price_30_handler(message: Message, session: AsyncSession, st
         return await message.answer("Ошибка парсинга, попробуйте еще раз")
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        client.update(Endpoint.GROUP, {
+        await client.update(Endpoint.GROUP, {
             "id": data["group_id"],
             "priceForOneDay": data.get("price_1").to_dict(),
             "priceForOneWeek": data.get("price_7").to_dict(),
             "priceForTwoWeeks": data.get("price_14").to_dict(),
             "priceForOneMonth": data.get("price_30").to_dict()
         })
+        group_card_cache.pop(data["group_id"])
         await message.answer(
             text=await get_group_info(message, session, data["group_id"]),
             reply_markup=group_kb(data["group_id"]),
@@ -832,10 +873,10 @@ async def group_delete_handler(callback: CallbackQuery, callback_data: GroupDele
     if not await is_vendor(session, str(callback.message.chat.id)):
         return await default_client_handler(callback.message)
 
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        group = client.get_by_id(Endpoint.GROUP, callback_data.group_id)
+        group = await client.get_by_id(Endpoint.GROUP, callback_data.group_id)
 
     except Exception as ex:
         return await callback.message.answer(str(ex))
@@ -853,14 +894,15 @@ async def group_delete_submit_handler(callback: CallbackQuery, callback_data: Gr
     if not await is_vendor(session, str(callback.message.chat.id)):
         return await default_client_handler(callback.message)
 
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        group = client.get_by_id(Endpoint.GROUP, callback_data.group_id)
+        group = await client.get_by_id(Endpoint.GROUP, callback_data.group_id)
         group_local = await get_group_by_telegram_id_and_user_telegram_id(session, group.get("groupTelegramId"),
                                                                           str(callback.message.chat.id))
         await delete_group(session, group_local)
-        client.delete(Endpoint.GROUP, callback_data.group_id)
+        await client.delete(Endpoint.GROUP, callback_data.group_id)
+        group_card_cache.pop(callback_data.group_id)
         await callback.message.edit_text(f"Группа <b>{group.get('name')}</b> удалена", parse_mode=ParseMode.HTML)
 
     except Exception as ex:
@@ -884,7 +926,7 @@ async def create_post_handler(message: Message, session: AsyncSession, state: FS
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     groups = await get_user_groups(session, found_user.id)
     if not groups:
@@ -894,7 +936,7 @@ async def create_post_handler(message: Message, session: AsyncSession, state: FS
     cities = {}
     for group in groups:
         try:
-            subject = client.get_by_id(Endpoint.SUBJECT, group.subject_id)
+            subject = await catalog.get_subject(client, group.subject_id)
             if subject.get("id") not in subjects_dict:
                 subjects_dict[subject.get("id")] = subject.get("name")
 
@@ -930,12 +972,11 @@ async def create_post_city_handler(callback: CallbackQuery, callback_data: Subje
         return await default_client_handler(callback.message)
 
     await state.update_data(subject_id=callback_data.subject_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][callback_data.subject_id]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][callback_data.subject_id])
         if not cities:
             return await callback.answer("Города не добавлены")
 
@@ -956,10 +997,10 @@ async def create_post_groups_handler(callback: CallbackQuery, callback_data: Cit
         return await default_client_handler(callback.message)
 
     await state.update_data(city_id=callback_data.city_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.GROUP, {
+        response = await client.get_all(Endpoint.GROUP, {
             "cityId": callback_data.city_id,
             "userTelegramId": callback.message.chat.id
         })
@@ -980,11 +1021,10 @@ async def create_post_groups_back_handler(message: Message, session: AsyncSessio
         return await default_client_handler(message)
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][data["subject_id"]]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][data["subject_id"]])
         if not cities:
             return await message.answer("Города не добавлены")
 
@@ -1017,11 +1057,11 @@ async def create_post_calendar_back_handler(message: Message, session: AsyncSess
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
     try:
-        response = client.get_all(Endpoint.GROUP, {
+        response = await client.get_all(Endpoint.GROUP, {
             "cityId": data["city_id"],
             "userTelegramId": message.chat.id
         })
@@ -1062,9 +1102,9 @@ async def create_post_by_link_handler(message: Message, session: AsyncSession, s
         return await message.answer("Ошибка парсинга, попробуйте еще раз")
 
     try:
-        found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+        found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
         client = ApiClient(found_user)
-        posts = client.get_all(Endpoint.POST, {"messageId": messageId}).get("responseList")
+        posts = (await client.get_all(Endpoint.POST, {"messageId": messageId})).get("responseList")
         if not posts:
             return await message.answer("Публикация не найдена")
 
@@ -1086,6 +1126,7 @@ async def create_post_by_link_handler(message: Message, session: AsyncSession, s
 
         state_data = await state.get_data()
         publishDateTimes = {}
+        bodies = []
         for post in posts:
             publishDate = post.get('publishDate')
             publishTime = post.get('publishTime')
@@ -1093,7 +1134,7 @@ async def create_post_by_link_handler(message: Message, session: AsyncSession, s
                 publishDateTimes[publishDate] = []
 
             if publishTime not in publishDateTimes[publishDate]:
-                client.create(Endpoint.POST, {
+                bodies.append({
                     "publication": publication,
                     "groupId": state_data["group_id"],
                     "withPin": post.get('withPin'),
@@ -1104,6 +1145,15 @@ async def create_post_by_link_handler(message: Message, session: AsyncSession, s
                 })
                 publishDateTimes[publishDate].append(publishTime)
 
+        results = await client.create_many(Endpoint.POST, bodies)
+        failed = [f"{body['publishDate']} {body['publishTime']}: {result}"
+                  for body, result in zip(bodies, results) if isinstance(result, Exception)]
+        if failed and len(failed) == len(bodies):
+            return await message.answer("Не удалось создать публикацию:\n" + "\n".join(failed))
+
+        if failed:
+            await message.answer("Не удалось создать публикации:\n" + "\n".join(failed))
+
         await message.answer("Публикация создана", reply_markup=main_kb_by_role(message))
         await state.clear()
 
@@ -1242,10 +1292,10 @@ async def create_post_button_skip_handler(message: Message, session: AsyncSessio
                                          parse_mode=ParseMode.HTML)
 
     post_info = get_post_info(data)
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        group = client.get_by_id(Endpoint.GROUP, post_info.get("group_id"))
+        group = await client.get_by_id(Endpoint.GROUP, post_info.get("group_id"))
 
     except Exception as ex:
         return await message.answer(str(ex))
@@ -1339,7 +1389,7 @@ async def create_post_submit_ok_handler(message: Message, session: AsyncSession,
         return await default_client_handler(message)
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     publication_info = get_publication_info(data)
     post_info = get_post_info(data)
@@ -1354,24 +1404,36 @@ async def create_post_submit_ok_handler(message: Message, session: AsyncSession,
     )
     message_id = await publish_to_general_group(message.bot, publication_info)
 
+    posts = post_info.get("posts")
     try:
-        for post in post_info.get("posts"):
-            client.create(Endpoint.POST, PostView(
+        results, group = await asyncio.gather(
+            client.create_many(Endpoint.POST, [PostView(
                 publication=publication,
                 group_id=post_info.get('group_id'),
                 with_pin=post.get('with_pin'),
                 publish_date=post.get('date'),
                 publish_time=post.get('time'),
                 message_id=message_id
-            ).to_dict())
-
-        group = client.get_by_id(Endpoint.GROUP, post_info.get("group_id"))
+            ).to_dict() for post in posts]),
+            client.get_by_id(Endpoint.GROUP, post_info.get("group_id"))
+        )
 
     except Exception as ex:
         return await message.answer(str(ex))
 
+    failed = [f"{post['date'].strftime('%m-%d')} {post['time'].strftime('%H:%M')}: {result}"
+              for post, result in zip(posts, results) if isinstance(result, Exception)]
+    if failed and len(failed) == len(posts):
+        return await message.answer("Не удалось создать публикацию:\n" + "\n".join(failed))
+
+    total_price = post_info.get('total_price')
+    if failed:
+        await message.answer("Не удалось создать публикации:\n" + "\n".join(failed))
+        # The calendar only carries the price of the whole package, so failed slots take their share of it away.
+        total_price = total_price * (len(posts) - len(failed)) // len(posts)
+
     group_local = await get_group_by_telegram_id(session, group.get("groupTelegramId"))
-    await add_post(session, group_local.id, post_info.get('total_price'))
+    await add_post(session, group_local.id, total_price)
     await message.answer("Публикация создана", reply_markup=main_kb_by_role(message))
     await state.clear()
 
@@ -1391,18 +1453,11 @@ async def statistic_sample_all_handler(message: Message, session: AsyncSession,
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
-    groups = await get_user_groups(session, found_user.id)
-    if not groups:
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
+    if not found_user.groups_count:
         return await message.answer("У вас нету добавленных групп")
 
-    total = 0
-    month = 0
-    week = 0
-    for group in groups:
-        total += await get_total_price_all_time(session, group.id)
-        month += await get_total_price_last_days(session, group.id, 30)
-        week += await get_total_price_last_days(session, group.id, 7)
+    total, month, week = await get_user_earnings(session, found_user.id)
 
     await message.answer(f"Общая статистика\n"
                          f"Заработано всего - {total}\n"
@@ -1417,7 +1472,7 @@ async def statistic_sample_one_handler(message: Message, session: AsyncSession,
     if not await is_vendor(session, str(message.chat.id)):
         return await default_client_handler(message)
 
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     groups = await get_user_groups(session, found_user.id)
     if not groups:
@@ -1427,7 +1482,7 @@ async def statistic_sample_one_handler(message: Message, session: AsyncSession,
     cities = {}
     for group in groups:
         try:
-            subject = client.get_by_id(Endpoint.SUBJECT, group.subject_id)
+            subject = await catalog.get_subject(client, group.subject_id)
             if subject.get("id") not in subjects_dict:
                 subjects_dict[subject.get("id")] = subject.get("name")
 
@@ -1463,12 +1518,11 @@ async def statistic_city_handler(callback: CallbackQuery, callback_data: Subject
         return await default_client_handler(callback.message)
 
     await state.update_data(subject_id=callback_data.subject_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     data = await state.get_data()
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][callback_data.subject_id]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][callback_data.subject_id])
         if not cities:
             return await callback.answer("Города не добавлены")
 
@@ -1489,10 +1543,10 @@ async def statistic_groups_handler(callback: CallbackQuery, callback_data: CityC
         return await default_client_handler(callback.message)
 
     await state.update_data(city_id=callback_data.city_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.GROUP, {
+        response = await client.get_all(Endpoint.GROUP, {
             "cityId": callback_data.city_id,
             "userTelegramId": callback.message.chat.id
         })
@@ -1513,11 +1567,10 @@ async def statistic_groups_back_handler(message: Message, session: AsyncSession,
         return await default_client_handler(message)
 
     data = await state.get_data()
-    found_user = await find_user_by_telegram_id(session, str(message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(message.chat.id))
     client = ApiClient(found_user)
     try:
-        response = client.get_all(Endpoint.CITY, {"ids": data["cities"][data["subject_id"]]})
-        cities = response.get("responseList")
+        cities = await catalog.get_cities_by_ids(client, data["cities"][data["subject_id"]])
         if not cities:
             return await message.answer("Города не добавлены")
 
@@ -1531,6 +1584,28 @@ async def statistic_groups_back_handler(message: Message, session: AsyncSession,
         await message.answer(str(ex))
 
 
+def get_week_slots_count(schedule: dict) -> int:
+    # The schedule only lists the posting times of each week day, without dates or weekday names. Seven consecutive
+    # days cover every week day once, so their slots are the slots of the whole first week whatever the day order is.
+    try:
+        slots_counts = [len(day["times"]) for day in schedule["weeks"][0]["days"]]
+
+    except (KeyError, IndexError, TypeError):
+        slots_counts = None
+
+    if slots_counts is None or len(slots_counts) != 7:
+        raise ValueError("Неизвестный формат расписания группы")
+
+    return sum(slots_counts)
+
+
+def get_coverage_percent(posts_count: int, slots_count: int) -> int:
+    if not slots_count:
+        return 0
+
+    return min(int(posts_count * 100 / slots_count), 100)
+
+
 @router.callback_query(Statistic.group, GroupCbData.filter())
 async def statistic_group_handler(callback: CallbackQuery, callback_data: GroupCbData, session: AsyncSession,
                                   state: FSMContext):
@@ -1538,20 +1613,20 @@ async def statistic_group_handler(callback: CallbackQuery, callback_data: GroupC
         return await default_client_handler(callback.message)
 
     await state.update_data(group_id=callback_data.group_id)
-    found_user = await find_user_by_telegram_id(session, str(callback.message.chat.id))
+    found_user = await find_cached_user_by_telegram_id(session, str(callback.message.chat.id))
     client = ApiClient(found_user)
     try:
-        group = client.get_by_id(Endpoint.GROUP, callback_data.group_id)
-        schedule = client.get_by_id(Endpoint.SCHEDULE, callback_data.group_id)
-        times_in_day = len(schedule.get("weeks")[0].get("days")[0].get("times"))
-        posts_total_count = 0
-        for i in range(1, 8):
-            date = datetime.now() - timedelta(days=i)
-            posts = client.get_all(Endpoint.POST, {
-                "publishDate": date.date().strftime("%Y-%m-%d"),
-                "groupTelegramId": group["groupTelegramId"]
-            })
-            posts_total_count += posts.get("total")
+        group, schedule = await asyncio.gather(
+            client.get_by_id(Endpoint.GROUP, callback_data.group_id),
+            client.get_by_id(Endpoint.SCHEDULE, callback_data.group_id)
+        )
+        dates = [datetime.now().date() - timedelta(days=i) for i in range(1, 8)]
+        days_posts = await asyncio.gather(*(client.get_all(Endpoint.POST, {
+            "publishDate": date.strftime("%Y-%m-%d"),
+            "groupTelegramId": group["groupTelegramId"]
+        }) for date in dates))
+        posts_total_count = sum(posts.get("total") or 0 for posts in days_posts)
+        slots_total_count = get_week_slots_count(schedule)
 
     except Exception as ex:
         return await callback.answer(str(ex))
@@ -1560,16 +1635,15 @@ async def statistic_group_handler(callback: CallbackQuery, callback_data: GroupC
                                                                       group["groupTelegramId"],
                                                                       str(callback.message.chat.id))
 
-    total = await get_total_price_all_time(session, group_local.id)
-    month = await get_total_price_last_days(session, group_local.id, 30)
-    week = await get_total_price_last_days(session, group_local.id, 7)
+    total, month, week = await get_group_earnings(session, group_local.id)
 
     await callback.message.edit_text(text=f"Статистика группы <b>{group['name']}</b>\n"
                                           f"Заработано всего - {total}\n"
                                           f"Заработано за месяц - {month}\n"
                                           f"Заработано за неделю - {week}\n"
                                           f"Процент покрытия закрытых объявлений - "
-                                          f"{int(posts_total_count * 100 / times_in_day)}%", parse_mode=ParseMode.HTML)
+                                          f"{get_coverage_percent(posts_total_count, slots_total_count)}%",
+                                     parse_mode=ParseMode.HTML)
 
     await callback.message.answer("Главное меню", reply_markup=main_kb_by_role(callback.message))
     await state.clear()
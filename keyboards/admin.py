@@ -27,9 +27,10 @@ def administration_kb() -> ReplyKeyboardMarkup:
 
     kb.button(text="👤 Пользователи")
     kb.button(text="🗺 Направления и города")
+    kb.button(text="📣 Рассылка")
     kb.button(text="🏠 В главное меню")
 
-    kb.adjust(2, 1)
+    kb.adjust(2, 1, 1)
     return kb.as_markup(resize_keyboard=True)
 
 
@@ -39,31 +40,42 @@ class UserInfoCbData(CallbackData, prefix="user_info"):
 
 class PaginationCbData(CallbackData, prefix="pagination"):
     page: int
+    cursor: int = 0
+    backward: bool = False
 
 
-def all_users_kb(users: List[User], page: int = 0) -> InlineKeyboardMarkup:
+def all_users_kb(users: List[User], total: int, page: int = 0) -> InlineKeyboardMarkup:
     limit = config.PAGE_LIMIT
     start_offset = page * limit
-    end_offset = start_offset + limit
     index = 1
 
     kb = InlineKeyboardBuilder()
 
-    for user in users[start_offset:end_offset]:
+    for user in users:
         kb.row(InlineKeyboardButton(
             text=f"{start_offset + index}. {user.username}",
             callback_data=UserInfoCbData(user_id=user.id).pack()
         ))
         index += 1
 
-    pages_count = math.ceil(len(users) / limit)
-    previous_page = (page - 1) if page > 0 else pages_count - 1
-    next_page = (page + 1) if end_offset < len(users) else 0
+    pages_count = max(math.ceil(total / limit), 1)
+
+    if page > 0 and users:
+        previous_page = PaginationCbData(page=page - 1, cursor=users[0].id, backward=True)
+
+    else:
+        previous_page = PaginationCbData(page=pages_count - 1, backward=True)
+
+    if page < pages_count - 1 and users:
+        next_page = PaginationCbData(page=page + 1, cursor=users[-1].id)
+
+    else:
+        next_page = PaginationCbData(page=0)
 
     pagination_buttons = [
-        InlineKeyboardButton(text="⬅️", callback_data=PaginationCbData(page=previous_page).pack()),
+        InlineKeyboardButton(text="⬅️", callback_data=previous_page.pack()),
         InlineKeyboardButton(text=f"{page+1}/{pages_count}", callback_data="none"),
-        InlineKeyboardButton(text="➡️", callback_data=PaginationCbData(page=next_page).pack())
+        InlineKeyboardButton(text="➡️", callback_data=next_page.pack())
     ]
 
     kb.row(*pagination_buttons)
@@ -199,3 +211,32 @@ def back_kb() -> ReplyKeyboardMarkup:
     kb = ReplyKeyboardBuilder()
     kb.button(text="Назад")
     return kb.as_markup(resize_keyboard=True)
+
+
+def broadcast_audience_kb() -> ReplyKeyboardMarkup:
+    kb = ReplyKeyboardBuilder()
+    kb.button(text="Всем")
+    kb.button(text="Продавцам")
+    kb.button(text="Отменить")
+
+    kb.adjust(2, 1)
+    return kb.as_markup(resize_keyboard=True)
+
+
+def broadcast_submit_kb() -> ReplyKeyboardMarkup:
+    kb = ReplyKeyboardBuilder()
+    kb.button(text="Подтвердить")
+    kb.button(text="Отменить")
+
+    kb.adjust(2)
+    return kb.as_markup(resize_keyboard=True)
+
+
+class BroadcastCancelCbData(CallbackData, prefix="broadcast_cancel"):
+    broadcast_id: int
+
+
+def broadcast_status_kb(broadcast_id: int) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    kb.button(text="⏹ Остановить", callback_data=BroadcastCancelCbData(broadcast_id=broadcast_id).pack())
+    return kb.as_markup()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import logging
+
+from config_reader import config
+from database.engine import create_db, session_maker
+from database.migrations import migrate, get_schema_version, LATEST_VERSION
+from database.orm_queries import backfill_message_activity, rebuild_earnings
+from database.partitions import maintain_partitions
+
+
+async def backfill_activity(args: argparse.Namespace):
+    await create_db()
+    async with session_maker() as session:
+        buckets_count = await backfill_message_activity(session)
+
+    print(f"Activity buckets rebuilt: {buckets_count}")
+
+
+async def run_rebuild_earnings(args: argparse.Namespace):
+    await create_db()
+    async with session_maker() as session:
+        mismatched_groups_count = await rebuild_earnings(session)
+
+    print(f"Earnings summary rebuilt, groups corrected: {mismatched_groups_count}")
+
+
+async def run_migrations(args: argparse.Namespace):
+    if args.status:
+        print(f"Schema version: {await get_schema_version()}/{LATEST_VERSION}")
+        return
+
+    applied = await migrate(args.target or LATEST_VERSION)
+    for migration in applied:
+        print(f"Applied {migration.version}: {migration.description}")
+
+    print(f"Schema version: {await get_schema_version()}/{LATEST_VERSION}")
+
+
+async def run_partitions(args: argparse.Namespace):
+    created, dropped = await maintain_partitions(
+        ahead_days=args.ahead_days,
+        retention_days=None if args.keep_old else args.retention_days
+    )
+    print(f"Partitions created: {', '.join(created) or 'none'}")
+    print(f"Partitions dropped: {', '.join(dropped) or 'none'}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_activity_parser = subparsers.add_parser("backfill-activity",
+                                                     help="Rebuild message activity rollups from messages")
+    backfill_activity_parser.set_defaults(handler=backfill_activity)
+
+    rebuild_earnings_parser = subparsers.add_parser("rebuild-earnings",
+                                                    help="Rebuild the earnings summary from posts")
+    rebuild_earnings_parser.set_defaults(handler=run_rebuild_earnings)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Apply pending schema migrations")
+    migrate_parser.add_argument("--target", type=int, help="Stop after this schema version")
+    migrate_parser.add_argument("--status", action="store_true", help="Only print the current schema version")
+    migrate_parser.set_defaults(handler=run_migrations)
+
+    partitions_parser = subparsers.add_parser("partitions",
+                                              help="Create upcoming message partitions and drop expired ones")
+    partitions_parser.add_argument("--ahead-days", type=int, default=config.MESSAGE_PARTITIONS_AHEAD_DAYS)
+    partitions_parser.add_argument("--retention-days", type=int, default=config.MESSAGE_RETENTION_DAYS)
+    partitions_parser.add_argument("--keep-old", action="store_true", help="Only create upcoming partitions")
+    partitions_parser.set_defaults(handler=run_partitions)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
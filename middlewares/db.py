@@ -1,13 +1,70 @@
-from typing import Any, Awaitable, Callable, Dict
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+
+class SessionStats:
+    def __init__(self):
+        self.updates = 0
+        self.sessions_opened = 0
+        self.total_session_lifetime = 0.0
+        self.max_session_lifetime = 0.0
+
+    def on_session_closed(self, lifetime: float):
+        self.total_session_lifetime += lifetime
+        self.max_session_lifetime = max(self.max_session_lifetime, lifetime)
+
+    def to_dict(self) -> dict:
+        return {
+            "updates": self.updates,
+            "sessions_opened": self.sessions_opened,
+            "avg_session_lifetime": self.total_session_lifetime / self.sessions_opened if self.sessions_opened else 0,
+            "max_session_lifetime": self.max_session_lifetime
+        }
+
+
+class LazySession:
+    def __init__(self, session_pool: async_sessionmaker, stats: SessionStats):
+        self._session_pool = session_pool
+        self._stats = stats
+        self._session: Optional[AsyncSession] = None
+        self._opened_at = 0.0
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_pool()
+            self._opened_at = time.perf_counter()
+            self._stats.sessions_opened += 1
+
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_session(), name)
+
+    async def finish(self, failed: bool):
+        if self._session is None:
+            return
+
+        try:
+            if failed:
+                await self._session.rollback()
+
+            elif self._session.in_transaction():
+                await self._session.commit()
+
+        finally:
+            await self._session.close()
+            self._stats.on_session_closed(time.perf_counter() - self._opened_at)
+            self._session = None
 
 
 class DatabaseSessionMiddleware(BaseMiddleware):
     def __init__(self, session_pool: async_sessionmaker):
         self.session_pool = session_pool
+        self.stats = SessionStats()
 
     async def __call__(
         self,
@@ -15,6 +72,16 @@ class DatabaseSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
-            data["session"] = session
+        self.stats.updates += 1
+        session = LazySession(self.session_pool, self.stats)
+        data["session"] = session
+        failed = False
+        try:
             return await handler(event, data)
+
+        except Exception:
+            failed = True
+            raise
+
+        finally:
+            await session.finish(failed)
@@ -0,0 +1,68 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from utils.metrics import MetricsRegistry
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    def __init__(self, registry: MetricsRegistry):
+        self.updates = registry.counter("bot_updates_total", "Updates received by type", ("update_type",))
+        self.in_flight = registry.gauge("bot_updates_in_flight", "Updates being processed")
+        self.latency = registry.histogram("bot_update_duration_seconds", "Update processing time by type",
+                                          ("update_type",))
+        self.errors = registry.counter("bot_update_errors_total", "Updates that raised by type", ("update_type",))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        self.updates.inc(update_type)
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+
+        except Exception:
+            self.errors.inc(update_type)
+            raise
+
+        finally:
+            self.latency.observe(update_type, value=time.perf_counter() - started)
+            self.in_flight.dec()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    def __init__(self, registry: MetricsRegistry):
+        self.calls = registry.counter("bot_handler_calls_total", "Handler calls", ("router", "handler"))
+        self.in_flight = registry.gauge("bot_handler_in_flight", "Handler calls in progress", ("router", "handler"))
+        self.latency = registry.histogram("bot_handler_duration_seconds", "Handler execution time",
+                                          ("router", "handler"))
+        self.errors = registry.counter("bot_handler_errors_total", "Handler calls that raised", ("router", "handler"))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        labels = (callback.__module__, callback.__name__)
+        self.calls.inc(*labels)
+        self.in_flight.inc(*labels)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+
+        except Exception:
+            self.errors.inc(*labels)
+            raise
+
+        finally:
+            self.latency.observe(*labels, value=time.perf_counter() - started)
+            self.in_flight.dec(*labels)
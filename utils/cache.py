@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float, on_remove: Optional[Callable[[Hashable, Any], None]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self.items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self.items[key]
+            self.removed(key, value)
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.items[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self.items.move_to_end(key)
+
+        while len(self.items) > self.max_size:
+            evicted_key, (evicted_value, _) = self.items.popitem(last=False)
+            self.evictions += 1
+            self.removed(evicted_key, evicted_value)
+
+    def pop(self, key: Hashable):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self.invalidations += 1
+            self.removed(key, item[0])
+
+    def pop_where(self, predicate: Callable[[Any], bool]):
+        for key in [key for key, (value, _) in self.items.items() if predicate(value)]:
+            self.pop(key)
+
+    def clear(self):
+        self.invalidations += len(self.items)
+        items, self.items = self.items, OrderedDict()
+        for key, (value, _) in items.items():
+            self.removed(key, value)
+
+    def removed(self, key: Hashable, value: Any):
+        if self.on_remove is not None:
+            self.on_remove(key, value)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from utils.cache import TTLCache, MISSING
+
+INTERACTIVE = 0
+BULK = 1
+
+RATE_LIMITED_PREFIXES = ("send", "copy", "forward", "edit")
+
+send_priority: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends():
+    token = send_priority.set(BULK)
+    try:
+        yield
+
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.waiters = []
+        self.counter = itertools.count()
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        self.refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.counter), future))
+        self.release_waiters()
+        await future
+
+    def pause(self, seconds: float):
+        self.refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def on_wakeup(self):
+        self.wakeup = None
+        self.release_waiters()
+
+    def release_waiters(self):
+        self.refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+
+            self.tokens -= 1
+            future.set_result(None)
+
+        if self.waiters and self.wakeup is None:
+            delay = (1 - self.tokens) / self.rate
+            self.wakeup = asyncio.get_running_loop().call_later(delay, self.on_wakeup)
+
+
+class RateLimitedSession(AiohttpSession):
+    def __init__(self, global_rate: float, private_chat_rate: float, group_chat_rate: float, chat_burst: float,
+                 max_retries: int, chats_cache_size: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_chat_rate = private_chat_rate
+        self.group_chat_rate = group_chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.chat_buckets = TTLCache(max_size=chats_cache_size, ttl=60)
+        self.retries = 0
+
+    def get_chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is MISSING:
+            is_group = str(chat_id).startswith(("-", "@"))
+            bucket = TokenBucket(self.group_chat_rate if is_group else self.private_chat_rate, self.chat_burst)
+
+        self.chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        if not method.__api_method__.startswith(RATE_LIMITED_PREFIXES):
+            return await super().make_request(bot, method, timeout)
+
+        priority = send_priority.get()
+        chat_id = getattr(method, "chat_id", None)
+        chat_bucket = self.get_chat_bucket(chat_id) if chat_id is not None else None
+
+        for attempt in range(self.max_retries + 1):
+            if chat_bucket is not None:
+                await chat_bucket.acquire(priority)
+
+            await self.global_bucket.acquire(priority)
+            try:
+                return await super().make_request(bot, method, timeout)
+
+            except TelegramRetryAfter as ex:
+                if attempt == self.max_retries:
+                    raise
+
+                self.retries += 1
+                logging.warning("Flood control on %s for chat %s, retrying in %s s", method.__api_method__, chat_id,
+                                ex.retry_after)
+                (chat_bucket or self.global_bucket).pause(ex.retry_after)
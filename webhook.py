@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import secrets
+from contextlib import suppress
+from typing import List
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from pydantic import ValidationError
+
+from config_reader import config
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookWorkerPool:
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers_count: int, queue_size: int, secret_token: str):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers_count = workers_count
+        self.secret_token = secret_token
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.workers: List[asyncio.Task] = []
+
+    def start(self):
+        for _ in range(self.workers_count):
+            self.workers.append(asyncio.create_task(self.work()))
+
+    async def stop(self):
+        await self.queue.join()
+        for worker in self.workers:
+            worker.cancel()
+
+        for worker in self.workers:
+            with suppress(asyncio.CancelledError):
+                await worker
+
+        self.workers.clear()
+
+    async def work(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+
+            except Exception:
+                logger.exception("Failed to process update %s", update.update_id)
+
+            finally:
+                self.queue.task_done()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not secrets.compare_digest(request.headers.get(SECRET_TOKEN_HEADER, ""), self.secret_token):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+
+        except (ValueError, ValidationError):
+            return web.Response(status=400)
+
+        await self.queue.put(update)
+        return web.Response()
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, allowed_updates: List[str], **kwargs):
+    if not config.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL must be set to run in webhook mode")
+
+    if config.WEBHOOK_SECRET:
+        secret_token = config.WEBHOOK_SECRET.get_secret_value()
+
+    else:
+        secret_token = secrets.token_urlsafe(32)
+        logger.info("WEBHOOK_SECRET is not set, using a generated secret token")
+    pool = WebhookWorkerPool(dispatcher, bot, config.WEBHOOK_WORKERS, config.WEBHOOK_QUEUE_SIZE, secret_token)
+
+    app = web.Application()
+    app.router.add_post(config.WEBHOOK_PATH, pool.handle)
+    runner = web.AppRunner(app)
+
+    workflow_data = {"dispatcher": dispatcher, "bot": bot, **dispatcher.workflow_data, **kwargs}
+    await dispatcher.emit_startup(**workflow_data)
+    try:
+        pool.start()
+        await runner.setup()
+        await web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+            secret_token=secret_token,
+            allowed_updates=allowed_updates,
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+            drop_pending_updates=config.DROP_PENDING_UPDATES
+        )
+        logger.info("Listening for webhook updates on %s:%s%s", config.WEBHOOK_HOST, config.WEBHOOK_PORT,
+                    config.WEBHOOK_PATH)
+        await asyncio.Event().wait()
+
+    finally:
+        await runner.cleanup()
+        await pool.stop()
+        await dispatcher.emit_shutdown(**workflow_data)
+        await bot.session.close()